@@ -0,0 +1,56 @@
+"""Runs autobean benchmarks.
+
+Example:
+    python -m autobean.benchmarks --years 3 --output results.json --baseline baseline.json
+"""
+
+import argparse
+import dataclasses
+import json
+import sys
+import tempfile
+from typing import Optional
+from autobean.benchmarks import generator, runner, scenarios
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m autobean.benchmarks', description='Runs autobean benchmarks.')
+    parser.add_argument('-k', dest='filters', action='append', default=[],
+                        help='only runs scenarios whose names contain this string')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', help='path to write JSON results to')
+    parser.add_argument('--baseline', help='path to JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='slowdown relative to the baseline reported as a regression')
+    parser.add_argument('--directory', help='directory to generate the ledger in (default: temporary directory)')
+    generator.add_params_arguments(parser)
+    args = parser.parse_args(argv)
+
+    params = generator.params_from_arguments(args)
+    selected = [
+        scenario for scenario in scenarios.SCENARIOS
+        if not args.filters or any(f in scenario.name for f in args.filters)
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ledger = generator.generate(params, args.directory or tmp_dir)
+        results = runner.run(selected, ledger, args.rounds)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(runner.to_json(ledger, results), f, indent=2)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('params') != dataclasses.asdict(params):
+            print('Warning: baseline was generated with different parameters.', file=sys.stderr)
+    comparisons = runner.compare(results, baseline)
+    print(runner.format_comparisons(comparisons, args.threshold))
+    regressed = any(
+        (ratio := comparison.ratio) is not None and ratio > 1 + args.threshold
+        for comparison in comparisons)
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
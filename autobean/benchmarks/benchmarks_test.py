@@ -0,0 +1,49 @@
+import json
+import pathlib
+import pytest
+from . import __main__, generator, importtime, runner, scenarios
+
+_PARAMS = generator.LedgerParams(
+    parties=2, accounts=3, years=1, transactions_per_day=1, policies=2, links=1, statements=2, splits=1,
+    narration_files=3, overloaded_customs=10, drip_lots=10)
+
+
+@pytest.fixture(scope='module')
+def ledger(tmp_path_factory: pytest.TempPathFactory) -> generator.GeneratedLedger:
+    return generator.generate(_PARAMS, str(tmp_path_factory.mktemp('ledger')))
+
+
+def test_generate_deterministic(tmp_path: pathlib.Path, ledger: generator.GeneratedLedger) -> None:
+    regenerated = generator.generate(_PARAMS, str(tmp_path))
+    assert pathlib.Path(regenerated.main_path).read_text() == pathlib.Path(ledger.main_path).read_text()
+
+
+@pytest.mark.parametrize('scenario', scenarios.SCENARIOS, ids=[scenario.name for scenario in scenarios.SCENARIOS])
+def test_scenario(scenario: scenarios.Scenario, ledger: generator.GeneratedLedger) -> None:
+    result = runner.run_scenario(scenario, ledger, rounds=1)
+    assert result.rounds == 1 and result.min >= 0
+
+
+def test_main(tmp_path: pathlib.Path) -> None:
+    output = tmp_path / 'results.json'
+    params = ['--years', '1', '--transactions-per-day', '1', '--rounds', '1', '-k', 'sorted']
+    assert __main__.main([*params, '--output', str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert list(results['results']) == ['sorted']
+
+
+def test_compare() -> None:
+    comparisons = runner.compare(
+        {'sorted': runner.Result(rounds=1, min=1.0, max=1.0, mean=1.0, median=1.0)},
+        {'results': {'sorted': {'min': 0.5}}})
+    assert comparisons[0].ratio == 2.0
+    assert 'REGRESSION' in runner.format_comparisons(comparisons, 0.2)
+
+
+@pytest.mark.parametrize(
+    'entry_point',
+    [entry_point for entry_point in importtime.ENTRY_POINTS if entry_point.deferred_modules],
+    ids=lambda entry_point: entry_point.module)
+def test_deferred_imports(entry_point: importtime.EntryPoint) -> None:
+    # timings are too noisy to assert on here
+    assert importtime.measure(entry_point).eagerly_imported == []
@@ -0,0 +1,298 @@
+"""Seeded generator of synthetic ledgers exercising every autobean plugin."""
+
+import argparse
+import collections
+import dataclasses
+import datetime
+import os.path
+import random
+from typing import Iterator
+
+_NAMES = ['Alice', 'Bob', 'Carol', 'Dave', 'Erin', 'Frank', 'Grace', 'Heidi']
+_START_DATE = datetime.date(2000, 1, 1)
+MAIN_LEDGER = 'main.bean'
+
+
+@dataclasses.dataclass(frozen=True)
+class LedgerParams:
+    seed: int = 0
+    parties: int = 3
+    accounts: int = 20
+    years: int = 1
+    transactions_per_day: int = 5
+    # named and wildcard autobean.share policies
+    policies: int = 5
+    # pairs of ledgers linked with autobean.share.link
+    links: int = 2
+    # monthly statements checked with autobean.xcheck
+    statements: int = 12
+    # stock splits handled by autobean.stock_split
+    splits: int = 2
+    # monthly receivable settlements with autobean.share.pad
+    pads: int = 12
+    # small files with comment narrations, included by a ledger of their own
+    narration_files: int = 200
+    # overloaded autobean.share.balance customs, built in memory for autobean.utils.plugin_lib dispatching
+    overloaded_customs: int = 50000
+    # lots of a dividend reinvestment account split with autobean.stock_split
+    drip_lots: int = 5000
+
+
+@dataclasses.dataclass(frozen=True)
+class GeneratedLedger:
+    params: LedgerParams
+    directory: str
+    # ledger with directives of every plugin
+    main_path: str
+    # ledgers included with autobean.include
+    included_paths: list[str]
+    # ledgers included with autobean.share.include, with accounts linked pairwise
+    linked_paths: list[str]
+    statement_paths: list[str]
+    # ledger including small files with comment narrations
+    narration_path: str
+    # ledger of a dividend reinvestment account and its split
+    drip_path: str
+
+
+def add_params_arguments(parser: argparse.ArgumentParser) -> None:
+    for field in dataclasses.fields(LedgerParams):
+        parser.add_argument(f'--{field.name.replace("_", "-")}', dest=field.name, type=int, default=field.default)
+
+
+def params_from_arguments(args: argparse.Namespace) -> LedgerParams:
+    return LedgerParams(**{field.name: getattr(args, field.name) for field in dataclasses.fields(LedgerParams)})
+
+
+def party_names(count: int) -> list[str]:
+    return [_NAMES[i] if i < len(_NAMES) else f'Party{i}' for i in range(count)]
+
+
+def generate(params: LedgerParams, directory: str) -> GeneratedLedger:
+    """Writes a synthetic ledger into the directory.
+
+    The same parameters always produce the same ledger.
+    """
+    return _Generator(params, directory).generate()
+
+
+class _Generator:
+
+    def __init__(self, params: LedgerParams, directory: str):
+        self._params = params
+        self._directory = directory
+        self._random = random.Random(params.seed)
+        self._parties = party_names(max(params.parties, 1))
+        self._expense_accounts = [f'Expenses:Category{i}' for i in range(max(params.accounts, 1))]
+        self._end_date = _START_DATE.replace(year=_START_DATE.year + params.years)
+        # (date, amount) of postings on Assets:Bank by (year, month)
+        self._bank_postings = collections.defaultdict[tuple[int, int], list[tuple[datetime.date, str]]](list)
+
+    def generate(self) -> GeneratedLedger:
+        os.makedirs(os.path.join(self._directory, 'statements'), exist_ok=True)
+        os.makedirs(os.path.join(self._directory, 'narrations'), exist_ok=True)
+        linked_paths = self._write_linked_ledgers()
+        transactions = list(self._transactions())
+        statement_paths = self._write_statements()
+        included_path = 'included.bean'
+        self._write(included_path, self._included_ledger())
+        narration_path = self._write_narration_ledgers()
+        drip_path = self._write_drip_ledger()
+        main_path = self._write(MAIN_LEDGER, '\n'.join([
+            *self._opens(),
+            *self._policies(),
+            f'{_START_DATE} custom "autobean.include" "{included_path}"',
+            *(f'{_START_DATE} custom "autobean.share.include" "{path}"' for path in linked_paths),
+            *self._share_links(linked_paths),
+            # in date order, stable for directives on the same date
+            *(text for _, text in sorted(
+                [*transactions, *self._splits(), *self._xchecks(statement_paths), *self._pads()],
+                key=lambda item: item[0])),
+        ]))
+        return GeneratedLedger(
+            params=self._params,
+            directory=self._directory,
+            main_path=main_path,
+            included_paths=[os.path.join(self._directory, included_path)],
+            linked_paths=[os.path.join(self._directory, path) for path in linked_paths],
+            statement_paths=[os.path.join(self._directory, path) for path in statement_paths],
+            narration_path=narration_path,
+            drip_path=drip_path,
+        )
+
+    def _write(self, path: str, content: str) -> str:
+        full_path = os.path.join(self._directory, path)
+        with open(full_path, 'w') as f:
+            f.write(content + '\n')
+        return full_path
+
+    def _dates(self) -> Iterator[datetime.date]:
+        date = _START_DATE
+        while date < self._end_date:
+            yield date
+            date += datetime.timedelta(days=1)
+
+    def _amount(self) -> str:
+        return f'{self._random.randint(100, 100000) / 100:.2f}'
+
+    def _opens(self) -> Iterator[str]:
+        yield f'{_START_DATE} open Assets:Bank'
+        yield f'{_START_DATE} open Assets:Broker'
+        yield f'{_START_DATE} open Assets:Cash'
+        for account in self._expense_accounts:
+            yield f'{_START_DATE} open {account}'
+
+    def _policies(self) -> Iterator[str]:
+        yield f'{_START_DATE} custom "autobean.share.policy" "default"\n    share-{self._parties[0]}: 1'
+        for i in range(self._params.policies):
+            parties = self._random.sample(self._parties, self._random.randint(1, len(self._parties)))
+            shares = ''.join(f'\n    share-{party}: {self._random.randint(1, 3)}' for party in parties)
+            if i % 2:
+                yield f'{_START_DATE} custom "autobean.share.policy" "policy{i}"{shares}'
+            else:
+                account = self._expense_accounts[i % len(self._expense_accounts)]
+                yield f'{_START_DATE} custom "autobean.share.policy" "{account}:*"{shares}'
+
+    def _transactions(self) -> Iterator[tuple[datetime.date, str]]:
+        for date in self._dates():
+            for _ in range(self._params.transactions_per_day):
+                amount = self._amount()
+                account = self._random.choice(self._expense_accounts)
+                party = self._random.choice(self._parties)
+                self._bank_postings[(date.year, date.month)].append((date, f'-{amount}'))
+                comment = f' ;; item {self._random.randint(0, 999)}' if self._random.random() < 0.5 else ''
+                yield date, '\n'.join([
+                    f'{date} *',
+                    f'    Assets:Bank  -{amount} USD',
+                    f'    {account}  {amount} USD{comment}',
+                    f'        share-{party}: 1',
+                ])
+
+    def _splits(self) -> Iterator[tuple[datetime.date, str]]:
+        if not self._params.splits:
+            return
+        days = (self._end_date - _START_DATE).days
+        split_dates = sorted(
+            _START_DATE + datetime.timedelta(days=self._random.randrange(1, days))
+            for _ in range(self._params.splits))
+        for i, date in enumerate(self._dates()):
+            if i % 7 == 0:
+                yield date, '\n'.join([
+                    f'{date} *',
+                    f'    Assets:Broker  {self._random.randint(1, 10)} STOCK {{{self._amount()} USD}}',
+                    '    Assets:Cash',
+                ])
+        for date in split_dates:
+            yield date, f'{date} custom "autobean.stock_split" {self._random.randint(2, 10)} STOCK'
+
+    def _pads(self) -> Iterator[tuple[datetime.date, str]]:
+        """Settles what the second party owes the first one with the third one, from the first party's viewpoint."""
+        if len(self._parties) < 3:
+            return
+        receivable, source = f'Assets:Receivables:{self._parties[1]}', f'Assets:Receivables:{self._parties[2]}'
+        for i in range(min(self._params.pads, 12 * self._params.years)):
+            start = datetime.date(_START_DATE.year + i // 12, i % 12 + 1, 1)
+            end = datetime.date(start.year + start.month // 12, start.month % 12 + 1, 1)
+            yield start, f'{start} custom "autobean.share.pad" {receivable} {source}'
+            yield end, f'{end} custom "autobean.share.balance" {receivable} 0.00 USD'
+
+    def _included_ledger(self) -> str:
+        return '\n'.join([
+            f'{_START_DATE} open Assets:Included',
+            f'{_START_DATE} open Expenses:Category0',
+            *(
+                f'{date} *\n    Assets:Included  -{self._amount()} USD\n    Expenses:Category0'
+                for date in self._dates()
+            ),
+        ])
+
+    def _write_narration_ledgers(self) -> str:
+        """Writes small files of transactions with comment narrations and a ledger including all of them."""
+        paths = []
+        for i in range(self._params.narration_files):
+            path = f'narrations/{i:04}.bean'
+            lines = []
+            for j in range(10):
+                amount = self._amount()
+                lines.append('\n'.join([
+                    f'{_START_DATE + datetime.timedelta(days=j)} *',
+                    f'    Assets:Cash  -{amount} USD ;; file {i}',
+                    f'    Expenses:Category0  {amount} USD ;; item {self._random.randint(0, 999)}',
+                ]))
+            self._write(path, '\n'.join(lines))
+            paths.append(path)
+        return self._write('narrations.bean', '\n'.join([
+            f'{_START_DATE} open Assets:Cash',
+            f'{_START_DATE} open Expenses:Category0',
+            *(f'include "{path}"' for path in paths),
+        ]))
+
+    def _write_drip_ledger(self) -> str:
+        """Writes daily fractional reinvestments of two lots each and a split with every option."""
+        lines = [f'{_START_DATE} open Assets:Drip', f'{_START_DATE} open Assets:Cash']
+        date = _START_DATE
+        for _ in range((self._params.drip_lots + 1) // 2):
+            date += datetime.timedelta(days=1)
+            lines.append('\n'.join([
+                f'{date} *',
+                f'    Assets:Drip  0.{self._random.randint(1000, 9999)} DRIP {{{self._amount()} USD}}',
+                f'    Assets:Drip  0.{self._random.randint(1000, 9999)} DRIP {{{self._amount()} USD}}',
+                '    Assets:Cash',
+            ]))
+        date += datetime.timedelta(days=1)
+        lines.append('\n'.join([
+            f'{date} custom "autobean.stock_split" 3 DRIP',
+            '    split_consolidate: TRUE',
+            '    split_cost_precision: 0.0001',
+            '    split_max_postings: 1000',
+        ]))
+        return self._write('drip.bean', '\n'.join(lines))
+
+    def _write_linked_ledgers(self) -> list[str]:
+        """Writes pairs of ledgers recording the same transfers from both sides."""
+        paths = []
+        for i in range(self._params.links):
+            lines: tuple[list[str], list[str]] = (
+                [f'{_START_DATE} open Assets:Link{i}', f'{_START_DATE} open Assets:Bank'],
+                [f'{_START_DATE} open Liabilities:Link{i}', f'{_START_DATE} open Assets:Bank'],
+            )
+            for date in self._dates():
+                if self._random.random() < 0.2:
+                    amount = self._amount()
+                    lines[0].append(f'{date} *\n    Assets:Link{i}  {amount} USD\n    Assets:Bank')
+                    lines[1].append(f'{date} *\n    Liabilities:Link{i}  -{amount} USD\n    Assets:Bank')
+            for side, side_lines in enumerate(lines):
+                path = f'linked{i}-{side}.bean'
+                self._write(path, '\n'.join(side_lines))
+                paths.append(path)
+        return paths
+
+    def _share_links(self, linked_paths: list[str]) -> Iterator[str]:
+        for i in range(0, len(linked_paths), 2):
+            yield (
+                f'{_START_DATE} custom "autobean.share.link" '
+                f'"{linked_paths[i]}" Assets:Link{i // 2} "{linked_paths[i + 1]}" Liabilities:Link{i // 2}')
+
+    def _write_statements(self) -> list[str]:
+        """Writes monthly statements of the bank account, each with one posting missing from the main ledger."""
+        paths = []
+        for i in range(min(self._params.statements, 12 * self._params.years)):
+            year, month = _START_DATE.year + i // 12, i % 12 + 1
+            path = f'statements/{year}{month:02}.bean'
+            self._write(path, '\n'.join([
+                'option "plugin_processing_mode" "raw"',
+                *(
+                    f'{date} *\n    Assets:Bank  {amount} USD'
+                    for date, amount in self._bank_postings[(year, month)]
+                ),
+                f'{datetime.date(year, month, 1)} *\n    Assets:Bank  -1.00 USD',
+            ]))
+            paths.append(path)
+        return paths
+
+    def _xchecks(self, statement_paths: list[str]) -> Iterator[tuple[datetime.date, str]]:
+        for i, path in enumerate(statement_paths):
+            year, month = _START_DATE.year + i // 12, i % 12 + 1
+            start = datetime.date(year, month, 1)
+            end = datetime.date(year + month // 12, month % 12 + 1, 1)
+            yield end, f'{end} custom "autobean.xcheck" "{path}" {start} Assets:Bank'
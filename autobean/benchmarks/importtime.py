@@ -0,0 +1,92 @@
+"""Import time budgets of autobean entry points.
+
+Each entry point is imported in a fresh interpreter with `python -X importtime`, after the beancount modules that its
+host tool (bean-check or bean-extract) would have imported anyway. Only the time spent on top of those is counted.
+
+Example:
+    python -m autobean.benchmarks.importtime
+"""
+
+import dataclasses
+import json
+import subprocess
+import sys
+from typing import Optional
+
+_MARKER = 'autobean.benchmarks.importtime'
+
+
+@dataclasses.dataclass(frozen=True)
+class EntryPoint:
+    module: str
+    # modules already imported by the host tool
+    prelude: str
+    budget_ms: float
+    # modules that must only be imported on first use
+    deferred_modules: frozenset[str] = frozenset()
+
+
+_PLUGIN_PRELUDE = 'beancount.loader'
+# budgets leave room for noise and slower machines
+ENTRY_POINTS = [
+    EntryPoint('autobean.include', _PLUGIN_PRELUDE, 100),
+    EntryPoint('autobean.narration', _PLUGIN_PRELUDE, 100),
+    EntryPoint('autobean.share', _PLUGIN_PRELUDE, 100, frozenset({
+        'beancount.ops.pad', 'beancount.ops.balance', 'beancount.core.realization'})),
+    EntryPoint('autobean.sorted', _PLUGIN_PRELUDE, 100),
+    EntryPoint('autobean.stock_split', _PLUGIN_PRELUDE, 100),
+    EntryPoint('autobean.xcheck', _PLUGIN_PRELUDE, 100),
+    EntryPoint('autobean.truelayer', 'beancount.ingest.importer', 100, frozenset({
+        'requests', 'yaml', 'dateutil.parser', 'http.server', 'webbrowser'})),
+]
+
+
+@dataclasses.dataclass(frozen=True)
+class Measurement:
+    entry_point: EntryPoint
+    import_ms: float
+    # deferred modules imported nevertheless
+    eagerly_imported: list[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.import_ms <= self.entry_point.budget_ms and not self.eagerly_imported
+
+
+def measure(entry_point: EntryPoint) -> Measurement:
+    code = '; '.join([
+        'import sys, json',
+        f'import {entry_point.prelude}',
+        f'print({_MARKER!r}, file=sys.stderr, flush=True)',
+        f'import {entry_point.module}',
+        f'print(json.dumps(sorted(set(sys.modules).intersection({sorted(entry_point.deferred_modules)!r}))))',
+    ])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True)
+    lines = result.stderr.splitlines()
+    total_us = 0
+    for line in lines[lines.index(_MARKER) + 1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # only top-level imports, whose cumulative times include nested ones
+        if not name.startswith('  '):
+            total_us += int(cumulative)
+    return Measurement(entry_point, total_us / 1000, json.loads(result.stdout))
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ok = True
+    for entry_point in ENTRY_POINTS:
+        # the fastest of a few runs to reduce noise
+        measurement = min((measure(entry_point) for _ in range(3)), key=lambda m: m.import_ms)
+        ok = ok and measurement.ok
+        print(
+            f'{entry_point.module:<24} {measurement.import_ms:>8.1f} ms  budget {entry_point.budget_ms:>5.0f} ms'
+            + (f'  eagerly imports {", ".join(measurement.eagerly_imported)}' if measurement.eagerly_imported else '')
+            + ('' if measurement.ok else '  FAILED'))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Runs benchmark scenarios and compares results against a baseline."""
+
+import dataclasses
+import statistics
+import time
+from typing import Any, Iterable, Optional
+from autobean.benchmarks.generator import GeneratedLedger
+from autobean.benchmarks.scenarios import Scenario
+
+
+@dataclasses.dataclass(frozen=True)
+class Result:
+    rounds: int
+    min: float
+    max: float
+    mean: float
+    median: float
+
+
+@dataclasses.dataclass(frozen=True)
+class Comparison:
+    name: str
+    seconds: float
+    baseline_seconds: Optional[float]
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if self.baseline_seconds is None or not self.baseline_seconds:
+            return None
+        return self.seconds / self.baseline_seconds
+
+
+def run_scenario(scenario: Scenario, ledger: GeneratedLedger, rounds: int) -> Result:
+    func = scenario.setup(ledger)
+    # warm up caches shared across rounds, e.g. imports and loaded files
+    func()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return Result(
+        rounds=rounds,
+        min=min(timings),
+        max=max(timings),
+        mean=statistics.mean(timings),
+        median=statistics.median(timings),
+    )
+
+
+def run(scenarios: Iterable[Scenario], ledger: GeneratedLedger, rounds: int) -> dict[str, Result]:
+    return {scenario.name: run_scenario(scenario, ledger, rounds) for scenario in scenarios}
+
+
+def to_json(ledger: GeneratedLedger, results: dict[str, Result]) -> dict[str, Any]:
+    return {
+        'params': dataclasses.asdict(ledger.params),
+        'results': {name: dataclasses.asdict(result) for name, result in results.items()},
+    }
+
+
+def compare(results: dict[str, Result], baseline: dict[str, Any]) -> list[Comparison]:
+    """Compares the fastest round of each scenario against the baseline."""
+    baseline_results = baseline.get('results', {})
+    return [
+        Comparison(
+            name=name,
+            seconds=result.min,
+            baseline_seconds=baseline_results[name]['min'] if name in baseline_results else None)
+        for name, result in results.items()
+    ]
+
+
+def format_comparisons(comparisons: list[Comparison], threshold: float) -> str:
+    width = max((len(comparison.name) for comparison in comparisons), default=0)
+    lines = [f'{"scenario":<{width}}  {"seconds":>10}  {"baseline":>10}  {"ratio":>7}']
+    for comparison in comparisons:
+        baseline = f'{comparison.baseline_seconds:.4f}' if comparison.baseline_seconds is not None else '-'
+        ratio = comparison.ratio
+        ratio_str = f'{ratio:.2f}' if ratio is not None else '-'
+        flag = '  REGRESSION' if ratio is not None and ratio > 1 + threshold else ''
+        lines.append(f'{comparison.name:<{width}}  {comparison.seconds:>10.4f}  {baseline:>10}  {ratio_str:>7}{flag}')
+    return '\n'.join(lines)
@@ -0,0 +1,200 @@
+"""Benchmark scenarios, one or more per plugin.
+
+Each scenario prepares its inputs from a generated ledger outside of the timed region and returns the function to time.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import functools
+from typing import Any, Callable, Iterator, Optional
+from beancount import loader
+from beancount.core import account
+from beancount.core.amount import Amount
+from beancount.core.data import Custom, Directive, Transaction, new_metadata
+from beancount.parser.grammar import ValueType
+from autobean.benchmarks.generator import GeneratedLedger
+from autobean.include.plugin import IncludePlugin
+from autobean.narration import cache as narration_cache
+from autobean.narration.plugin import collect_comment_linenos, plugin as narration_plugin, read_comment_narrations
+from autobean.share import include as share_include
+from autobean.share.plugin import Plugin as SharePlugin
+from autobean.sorted.plugin import plugin as sorted_plugin
+from autobean.stock_split.plugin import Plugin as StockSplitPlugin
+from autobean.utils import deduplicate, plugin_lib
+from autobean.xcheck.plugin import CrossCheckPlugin
+
+_Setup = Callable[[GeneratedLedger], Callable[[], Any]]
+
+
+@dataclasses.dataclass(frozen=True)
+class Scenario:
+    name: str
+    setup: _Setup
+
+
+SCENARIOS: list[Scenario] = []
+
+
+def _scenario(name: str) -> Callable[[_Setup], _Setup]:
+    def decorator(setup: _Setup) -> _Setup:
+        SCENARIOS.append(Scenario(name, setup))
+        return setup
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def _load(path: str) -> tuple[list[Directive], dict[str, Any]]:
+    entries, _, options = loader.load_file(path)
+    return entries, options
+
+
+def _plugin_runner(ledger: GeneratedLedger, plugin: Callable[..., Any], *args: Any) -> Callable[[], Any]:
+    entries, options = _load(ledger.main_path)
+    # plugins may update options
+    return lambda: plugin(entries, dict(options), *args)
+
+
+@_scenario('include')
+def _include(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _plugin_runner(ledger, IncludePlugin.plugin)
+
+
+@_scenario('share')
+def _share(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _plugin_runner(ledger, SharePlugin.plugin, 'Alice')
+
+
+@_scenario('share.memo')
+def _share_memo(ledger: GeneratedLedger) -> Callable[[], Any]:
+    entries, options = _load(ledger.main_path)
+    cache = Custom(
+        new_metadata(ledger.main_path, 0), entries[0].date, 'autobean.share.cache', [ValueType('share.cache', str)])
+    entries = [cache, *entries]
+    run = lambda: SharePlugin.plugin(entries, dict(options), 'Alice')
+    # populates the memo outside of the timed region, again after share metadata is stripped from entries by the first
+    # run, as if they were loaded again
+    run()
+    run()
+    return run
+
+
+@_scenario('share.deduplicate_open_close')
+def _share_deduplicate_open_close(ledger: GeneratedLedger) -> Callable[[], Any]:
+    entries_list = [_load(path)[0] for path in [ledger.main_path, *ledger.linked_paths]]
+    return lambda: share_include.deduplicate_open_close(entries_list)
+
+
+@_scenario('xcheck')
+def _xcheck(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _plugin_runner(ledger, CrossCheckPlugin.plugin)
+
+
+@_scenario('narration')
+def _narration(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _plugin_runner(ledger, narration_plugin)
+
+
+def _read_comment_narrations(ledger: GeneratedLedger, max_workers: Optional[int]) -> Callable[[], Any]:
+    # one small file after another is where a pool of threads may overlap file I/O
+    linenos_by_file = collect_comment_linenos(_load(ledger.narration_path)[0])
+    # a fresh cache so that files are read every time
+    return lambda: read_comment_narrations(
+        narration_cache.NarrationCache(), linenos_by_file, max_workers)
+
+
+@_scenario('narration.read')
+def _narration_read(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _read_comment_narrations(ledger, None)
+
+
+@_scenario('narration.read_threads')
+def _narration_read_threads(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _read_comment_narrations(ledger, 8)
+
+
+@_scenario('sorted')
+def _sorted(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _plugin_runner(ledger, sorted_plugin)
+
+
+@_scenario('stock_split')
+def _stock_split(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _plugin_runner(ledger, StockSplitPlugin.plugin)
+
+
+@_scenario('stock_split.drip')
+def _stock_split_drip(ledger: GeneratedLedger) -> Callable[[], Any]:
+    entries, options = _load(ledger.drip_path)
+    return lambda: StockSplitPlugin.plugin(entries, dict(options))
+
+
+@plugin_lib.plugin('autobean.benchmarks.dispatch')
+class _DispatchPlugin(plugin_lib.BasePlugin):
+    """Exercises dispatching only."""
+
+    @plugin_lib.handle(Transaction)
+    def _handle_transaction(self, entry: Transaction) -> Iterator[Directive]:
+        yield entry
+
+    @plugin_lib.handle_custom('autobean.stock_split', 'a multiplier and a commodity')
+    def _handle_stock_split(self, entry: Custom, multiplier: decimal.Decimal, currency: plugin_lib.Currency) -> Iterator[Directive]:
+        yield entry
+
+    @plugin_lib.handle_custom('autobean.xcheck', 'a path, a start date and zero or more accounts')
+    def _handle_xcheck(
+            self,
+            entry: Custom,
+            path: str,
+            start: datetime.date,
+            *accounts: plugin_lib.Account) -> Iterator[Directive]:
+        yield entry
+
+    @plugin_lib.handle_custom('autobean.share.balance', 'an account and an amount')
+    def _handle_balance(self, entry: Custom, account: plugin_lib.Account, amount: Amount) -> Iterator[Directive]:
+        yield entry
+
+    @plugin_lib.handle_custom('autobean.share.balance', 'an account, an amount and a tolerance')
+    def _handle_balance_tolerance(
+            self,
+            entry: Custom,
+            account: plugin_lib.Account,
+            amount: Amount,
+            tolerance: decimal.Decimal) -> Iterator[Directive]:
+        yield entry
+
+
+@_scenario('plugin_lib.dispatch')
+def _plugin_lib_dispatch(ledger: GeneratedLedger) -> Callable[[], Any]:
+    return _plugin_runner(ledger, _DispatchPlugin.plugin)
+
+
+@_scenario('plugin_lib.dispatch_overloads')
+def _plugin_lib_dispatch_overloads(ledger: GeneratedLedger) -> Callable[[], Any]:
+    entries, options = _load(ledger.main_path)
+    date = entries[0].date
+    amount = ValueType(Amount(decimal.Decimal('0.00'), 'USD'), Amount)
+    tolerance = ValueType(decimal.Decimal('0.01'), decimal.Decimal)
+    # every other one only matches the second overload
+    customs = [
+        Custom(
+            new_metadata(ledger.main_path, i), date, 'autobean.share.balance',
+            [ValueType('Assets:Bank', account.TYPE), amount, *([tolerance] if i % 2 else [])])
+        for i in range(ledger.params.overloaded_customs)
+    ]
+    return lambda: _DispatchPlugin.plugin(customs, dict(options))
+
+
+@_scenario('plugin_lib.pipeline')
+def _plugin_lib_pipeline(ledger: GeneratedLedger) -> Callable[[], Any]:
+    pipeline = plugin_lib.Pipeline(StockSplitPlugin, IncludePlugin, CrossCheckPlugin)
+    return _plugin_runner(ledger, pipeline.plugin)
+
+
+@_scenario('utils.deduplicate')
+def _utils_deduplicate(ledger: GeneratedLedger) -> Callable[[], Any]:
+    entries, _ = _load(ledger.main_path)
+    # re-imports the last 30 days
+    cutoff = entries[-1].date - datetime.timedelta(days=30)
+    new_entries = [entry for entry in entries if isinstance(entry, Transaction) and entry.date >= cutoff]
+    return lambda: deduplicate.deduplicate(new_entries, entries)
@@ -1,24 +1,103 @@
+import collections
+import contextlib
+import dataclasses
 import os.path
-from typing import Any, Iterable, Optional
+import pickle
+import threading
+from typing import Any, Iterable, Iterator, Optional
 from beancount.core.data import Custom, Directive
 from beancount import loader
-from autobean.utils import plugin_lib
+from autobean.utils import error_lib, plugin_lib
+
+GRAPH_OPTION = 'autobean.include.graph'
+_THREAD_LOCAL = threading.local()
+
+
+@dataclasses.dataclass(frozen=True)
+class IncludeGraph:
+    """Ledgers loaded through autobean.include, keyed by the ledger including them."""
+    edges: dict[str, list[str]] = dataclasses.field(
+        default_factory=lambda: collections.defaultdict(list))
+
+    def add_edge(self, path: str, included_path: str) -> None:
+        if included_path not in self.edges[path]:
+            self.edges[path].append(included_path)
+
+    def dependents(self, path: str) -> set[str]:
+        """Returns ledgers directly or indirectly including the given ledger."""
+        reversed_edges = collections.defaultdict[str, list[str]](list)
+        for including_path, included_paths in self.edges.items():
+            for included_path in included_paths:
+                reversed_edges[included_path].append(including_path)
+        ret = set[str]()
+        stack = [path]
+        while stack:
+            for including_path in reversed_edges[stack.pop()]:
+                if including_path not in ret:
+                    ret.add(including_path)
+                    stack.append(including_path)
+        return ret
+
+
+@dataclasses.dataclass(frozen=True)
+class _LoadContext:
+    graph: IncludeGraph = dataclasses.field(default_factory=IncludeGraph)
+    # ledgers being loaded, outermost first
+    loading: list[str] = dataclasses.field(default_factory=list)
+    # (entries, errors, includes) pickled before any includer gets them, so that each later includer gets its own copy
+    loaded: dict[str, bytes] = dataclasses.field(default_factory=dict)
+
+
+@contextlib.contextmanager
+def _try_enter_context(path: str) -> Iterator[tuple[_LoadContext, bool]]:
+    context = getattr(_THREAD_LOCAL, 'load_context', None)
+    if context is not None:
+        yield context, False
+        return
+    context = _LoadContext(loading=[path])
+    _THREAD_LOCAL.load_context = context
+    try:
+        yield context, True
+    finally:
+        _THREAD_LOCAL.load_context = None
 
 
 @plugin_lib.plugin('autobean.include')
 class IncludePlugin(plugin_lib.BasePlugin):
     _includes: set[str]
+    _context: _LoadContext
+    _path: str
 
     def process(self, entries: list[Directive], options: dict[str, Any], arg: Optional[str]) -> Iterable[Directive]:
         self._includes = set(options['include'])
-        yield from super().process(entries, options, arg)
+        self._path = os.path.normpath(options['filename'])
+        with _try_enter_context(self._path) as (self._context, is_top_level):
+            yield from super().process(entries, options, arg)
         # Allow tools to refresh data when included files are updated.
         options['include'] = list(self._includes)
+        if is_top_level:
+            options[GRAPH_OPTION] = self._context.graph
 
     @plugin_lib.handle_custom('autobean.include', 'exactly one path')
     def _handle_include(self, custom: Custom, path: str) -> Iterable[Directive]:
-        path = os.path.join(os.path.dirname(custom.meta['filename']), path)
-        entries, errors, options = loader.load_file(path)
+        path = os.path.normpath(os.path.join(os.path.dirname(custom.meta['filename']), path))
+        if path in self._context.loading:
+            self._error_logger.log_error(error_lib.InvalidDirectiveError(
+                custom.meta,
+                f'Circular inclusion: {" -> ".join([*self._context.loading, path])}',
+                custom))
+            return ()
+        self._context.graph.add_edge(self._path, path)
+        if (loaded := self._context.loaded.get(path)) is None:
+            self._context.loading.append(path)
+            try:
+                entries, errors, options = loader.load_file(path)
+            finally:
+                self._context.loading.pop()
+            includes = options['include']
+            self._context.loaded[path] = pickle.dumps((entries, errors, includes), protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            entries, errors, includes = pickle.loads(loaded)
         self._error_logger.log_loading_errors(errors, custom)
-        self._includes.update(options['include'])
+        self._includes.update(includes)
         return entries
@@ -1,4 +1,8 @@
 import os.path
+from typing import Any
+import pytest
+from beancount import loader
+from beancount.core.data import Directive
 from autobean.include import plugin
 import autobean.utils.plugin_test_utils as utils
 
@@ -24,3 +28,52 @@ def test_include_option() -> None:
 
     assert not errors, errors
     assert external_path in ledger.options['include'], 'included files not added into options["include"]'
+
+
+def test_diamond_loaded_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    test_path = os.path.join(os.path.dirname(__file__), 'diamond')
+    def path(name: str) -> str:
+        return os.path.join(test_path, name)
+    ledger = utils.load_ledger(path('source.bean'))
+    loaded_paths = []
+    load_file = loader.load_file
+    def counting_load_file(filename: str) -> tuple[list[Directive], list, dict[str, Any]]:
+        loaded_paths.append(filename)
+        return load_file(filename)
+    monkeypatch.setattr(loader, 'load_file', counting_load_file)
+
+    _, errors = utils.apply_plugin(
+        plugin.IncludePlugin.plugin, ledger.entries, ledger.options, None)
+
+    assert not errors, errors
+    assert sorted(loaded_paths) == [path('_b.bean'), path('_c.bean'), path('_d.bean')]
+    graph = ledger.options[plugin.GRAPH_OPTION]
+    assert graph.edges == {
+        path('source.bean'): [path('_b.bean'), path('_c.bean')],
+        path('_b.bean'): [path('_d.bean')],
+        path('_c.bean'): [path('_d.bean')],
+    }
+    assert graph.dependents(path('_d.bean')) == {
+        path('source.bean'), path('_b.bean'), path('_c.bean')}
+
+
+def test_diamond_includers_isolated(monkeypatch: pytest.MonkeyPatch) -> None:
+    test_path = os.path.join(os.path.dirname(__file__), 'diamond')
+    ledger = utils.load_ledger(os.path.join(test_path, 'source.bean'))
+    load_file = loader.load_file
+    def touching_load_file(filename: str) -> tuple[list[Directive], list, dict[str, Any]]:
+        entries, errors, options = load_file(filename)
+        if filename.endswith('_b.bean'):
+            # as if by a later plugin of _b.bean, which modifies entries included from _d.bean in place
+            for entry in entries:
+                entry.meta['touched_by_b'] = True
+        return entries, errors, options
+    monkeypatch.setattr(loader, 'load_file', touching_load_file)
+
+    entries, errors = utils.apply_plugin(
+        plugin.IncludePlugin.plugin, ledger.entries, ledger.options, None)
+
+    assert not errors, errors
+    entries_d = [entry for entry in entries if entry.meta['filename'].endswith('_d.bean')]
+    assert len(entries_d) == 2 and entries_d[0] is not entries_d[1]
+    assert sorted(entry.meta.get('touched_by_b', False) for entry in entries_d) == [False, True]
@@ -0,0 +1,82 @@
+"""Cache of comment narrations keyed on file stat."""
+
+import collections
+import dataclasses
+import os
+import pickle
+import threading
+from typing import Optional
+from autobean.narration import comments
+
+_DEFAULT_MAX_FILES = 4096
+_StatKey = tuple[int, int, int]  # (size, mtime_ns, inode)
+
+
+@dataclasses.dataclass(frozen=True)
+class _CacheEntry:
+    stat_key: _StatKey
+    linenos: frozenset[int]
+    narrations: dict[int, str]
+
+
+class NarrationCache:
+    """LRU cache of comment narrations extracted from each file.
+
+    A file is only read again when its size, mtime or inode changes, or when narrations of lines not extracted before
+    are requested. The cache can optionally be backed by a file so that it persists across processes.
+    """
+
+    def __init__(self, max_files: int = _DEFAULT_MAX_FILES, path: Optional[str] = None) -> None:
+        self._max_files = max_files
+        self._path = path
+        self._entries = collections.OrderedDict[str, _CacheEntry]()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path is not None:
+            self._load()
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    def get(self, filename: str, linenos: set[int]) -> dict[int, str]:
+        stat = os.stat(filename)
+        stat_key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None and entry.stat_key == stat_key:
+                if linenos <= entry.linenos:
+                    self._entries.move_to_end(filename)
+                    return entry.narrations
+                linenos = linenos | entry.linenos
+        narrations = comments.extract_from_file(filename, linenos)
+        with self._lock:
+            self._entries[filename] = _CacheEntry(stat_key, frozenset(linenos), narrations)
+            self._entries.move_to_end(filename)
+            while len(self._entries) > self._max_files:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        return narrations
+
+    def save(self) -> None:
+        if self._path is None or not self._dirty:
+            return
+        with self._lock:
+            data = pickle.dumps(self._entries)
+            self._dirty = False
+        tmp_path = f'{self._path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path)
+
+    def _load(self) -> None:
+        assert self._path is not None
+        try:
+            with open(self._path, 'rb') as f:
+                entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return
+        if isinstance(entries, collections.OrderedDict):
+            self._entries = entries
+            while len(self._entries) > self._max_files:
+                self._entries.popitem(last=False)
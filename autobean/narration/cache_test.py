@@ -0,0 +1,67 @@
+import os
+import pathlib
+from typing import Container, Optional
+import pytest
+from . import cache, comments
+
+
+@pytest.fixture
+def extracted(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    filenames = []
+    extract_from_file = comments.extract_from_file
+    def counting_extract_from_file(filename: str, linenos: Optional[Container[int]] = None) -> dict[int, str]:
+        filenames.append(os.path.basename(filename))
+        return extract_from_file(filename, linenos)
+    monkeypatch.setattr(comments, 'extract_from_file', counting_extract_from_file)
+    return filenames
+
+
+def _write(path: pathlib.Path, content: str) -> str:
+    path.write_text(content)
+    return str(path)
+
+
+def test_cache_hit(tmp_path: pathlib.Path, extracted: list[str]) -> None:
+    foo = _write(tmp_path / 'foo.bean', 'a ;; foo\nb ;; bar\n')
+    narration_cache = cache.NarrationCache()
+
+    assert narration_cache.get(foo, {1}) == {1: 'foo'}
+    assert narration_cache.get(foo, {1}) == {1: 'foo'}
+    assert extracted == ['foo.bean']
+    assert narration_cache.get(foo, {1, 2}) == {1: 'foo', 2: 'bar'}
+    assert narration_cache.get(foo, {2}) == {1: 'foo', 2: 'bar'}
+    assert extracted == ['foo.bean', 'foo.bean']
+
+
+def test_cache_modified(tmp_path: pathlib.Path, extracted: list[str]) -> None:
+    foo = _write(tmp_path / 'foo.bean', 'a ;; foo\n')
+    narration_cache = cache.NarrationCache()
+
+    assert narration_cache.get(foo, {1}) == {1: 'foo'}
+    _write(tmp_path / 'foo.bean', 'a ;; foobar\n')
+    assert narration_cache.get(foo, {1}) == {1: 'foobar'}
+    assert extracted == ['foo.bean', 'foo.bean']
+
+
+def test_cache_eviction(tmp_path: pathlib.Path, extracted: list[str]) -> None:
+    foo = _write(tmp_path / 'foo.bean', 'a ;; foo\n')
+    bar = _write(tmp_path / 'bar.bean', 'a ;; bar\n')
+    narration_cache = cache.NarrationCache(max_files=1)
+
+    narration_cache.get(foo, {1})
+    narration_cache.get(bar, {1})
+    narration_cache.get(bar, {1})
+    narration_cache.get(foo, {1})
+    assert extracted == ['foo.bean', 'bar.bean', 'foo.bean']
+
+
+def test_cache_persisted(tmp_path: pathlib.Path, extracted: list[str]) -> None:
+    foo = _write(tmp_path / 'foo.bean', 'a ;; foo\n')
+    cache_path = str(tmp_path / 'cache')
+
+    narration_cache = cache.NarrationCache(path=cache_path)
+    assert narration_cache.get(foo, {1}) == {1: 'foo'}
+    narration_cache.save()
+    narration_cache = cache.NarrationCache(path=cache_path)
+    assert narration_cache.get(foo, {1}) == {1: 'foo'}
+    assert extracted == ['foo.bean']
@@ -1,13 +1,33 @@
-from typing import Dict, Optional
+import mmap
+import os
+from typing import Container, Optional
 
 
-def extract_from_file(filename: str) -> dict[int, str]:
-    ret = {}
-    with open(filename) as f:
-        for i, line in enumerate(f):
-            narration = extract_from_line(line)
-            if narration is not None:
-                ret[i + 1] = narration
+def extract_from_file(filename: str, linenos: Optional[Container[int]] = None) -> dict[int, str]:
+    """Extracts narration from comments of the given lines, or all lines if not specified.
+
+    Only lines containing `;;` are decoded.
+    """
+    ret: dict[int, str] = {}
+    with open(filename, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return ret
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lineno = 1
+            counted_pos = 0
+            pos = mm.find(b';;')
+            while pos != -1:
+                lineno += mm[counted_pos:pos].count(b'\n')
+                counted_pos = pos
+                line_start = mm.rfind(b'\n', 0, pos) + 1
+                line_end = mm.find(b'\n', pos)
+                if line_end == -1:
+                    line_end = len(mm)
+                if linenos is None or lineno in linenos:
+                    narration = extract_from_line(mm[line_start:line_end].decode())
+                    if narration is not None:
+                        ret[lineno] = narration
+                pos = mm.find(b';;', line_end)
     return ret
 
 
@@ -0,0 +1,25 @@
+import pathlib
+from . import comments
+
+
+def test_extract_from_file(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / 'ledger.bean'
+    path.write_bytes(
+        b'2000-01-01 * ;; header\r\n'
+        b'    Assets:Foo  1.00 USD ;; foo ; comment\r\n'
+        b'    Assets:Foo  1.00 USD ; comment ;; not narration\n'
+        b'    Assets:Bar  -2.00 USD ;;  bar\xc2\xa0baz ')
+
+    assert comments.extract_from_file(str(path)) == {
+        1: 'header',
+        2: 'foo',
+        4: 'bar\xa0baz',
+    }
+    assert comments.extract_from_file(str(path), {2, 3}) == {2: 'foo'}
+
+
+def test_extract_from_empty_file(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / 'ledger.bean'
+    path.write_bytes(b'')
+
+    assert comments.extract_from_file(str(path)) == {}
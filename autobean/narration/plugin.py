@@ -1,38 +1,148 @@
-from typing import Any
+import ast
+import collections
+import concurrent.futures
+import dataclasses
+import logging
+import os.path
+from typing import Any, Optional
 from beancount.core.data import Directive, Transaction
-from autobean.narration import comments
+from autobean.narration import cache
 
+_LOGGER = logging.getLogger(__name__)
+# Kept across runs so that reloading (e.g. in fava) only reads modified files.
+_CACHES: dict[Optional[str], cache.NarrationCache] = {}
 
-def plugin(entries: list[Directive], options: dict[str, Any]) -> tuple[list[Directive], list]:
-    filenames = collect_transaction_filenames(entries)
-    comment_narrations = {
-        filename: comments.extract_from_file(filename)
-        for filename in filenames
-    }
-    return [merge_narration(entry, comment_narrations) for entry in entries], []
 
+def plugin(entries: list[Directive], options: dict[str, Any], config: Optional[str] = None) -> tuple[list[Directive], list]:
+    cache_path, max_workers = parse_config(config)
+    if cache_path is not None:
+        cache_path = os.path.join(os.path.dirname(options['filename']), cache_path)
+    narration_cache = get_cache(cache_path)
+    linenos_by_file = collect_comment_linenos(entries)
+    comment_narrations = read_comment_narrations(narration_cache, linenos_by_file, max_workers)
+    narration_cache.save()
+    stats = MergeStats()
+    entries = merge_narrations(entries, comment_narrations, stats)
+    _LOGGER.debug(
+        'autobean.narration rewrote %d entries and passed through %d entries',
+        stats.rewritten, stats.passed_through)
+    return entries, []
 
-def collect_transaction_filenames(entries: list[Directive]) -> set[str]:
-    return {
-        entry.meta['filename']
-        for entry in entries
-        if isinstance(entry, Transaction) and 'filename' in entry.meta
-    }
+
+def parse_config(config: Optional[str]) -> tuple[Optional[str], Optional[int]]:
+    """Parses plugin config into (cache path, max number of reader threads)."""
+    if config is None:
+        return None, None
+    try:
+        parsed = ast.literal_eval(config)
+    except (ValueError, SyntaxError):
+        parsed = None
+    if not isinstance(parsed, dict) or set(parsed) - {'cache', 'max_workers'}:
+        raise ValueError(
+            f'autobean.narration expects a dict with optional keys "cache" and "max_workers": got {config!r}')
+    cache_path = parsed.get('cache')
+    max_workers = parsed.get('max_workers')
+    if cache_path is not None and not isinstance(cache_path, str):
+        raise ValueError(f'autobean.narration expects "cache" to be a str: got {cache_path!r}')
+    if max_workers is not None and (not isinstance(max_workers, int) or max_workers < 1):
+        raise ValueError(f'autobean.narration expects "max_workers" to be a positive int: got {max_workers!r}')
+    return cache_path, max_workers
+
+
+def get_cache(cache_path: Optional[str] = None) -> cache.NarrationCache:
+    """Returns the narration cache, optionally backed by the given file."""
+    if (narration_cache := _CACHES.get(cache_path)) is None:
+        narration_cache = _CACHES[cache_path] = cache.NarrationCache(path=cache_path)
+    return narration_cache
+
+
+def read_comment_narrations(
+        narration_cache: cache.NarrationCache,
+        linenos_by_file: dict[str, set[int]],
+        max_workers: Optional[int] = None,
+) -> dict[str, dict[int, str]]:
+    """Reads comment narrations of each file, optionally with a pool of threads to overlap file I/O."""
+    if max_workers is None or len(linenos_by_file) <= 1:
+        return {
+            filename: narration_cache.get(filename, linenos)
+            for filename, linenos in linenos_by_file.items()
+        }
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            filename: executor.submit(narration_cache.get, filename, linenos)
+            for filename, linenos in linenos_by_file.items()
+        }
+        return {filename: future.result() for filename, future in futures.items()}
+
+
+def collect_comment_linenos(entries: list[Directive]) -> dict[str, set[int]]:
+    """Collects locations of postings which may take narration from comments."""
+    linenos_by_file = collections.defaultdict[str, set[int]](set)
+    for entry in entries:
+        if not isinstance(entry, Transaction):
+            continue
+        for posting in entry.postings:
+            if posting.meta and posting.meta.get('narration') is None and 'filename' in posting.meta:
+                linenos_by_file[posting.meta['filename']].add(posting.meta.get('lineno'))
+    return linenos_by_file
+
+
+@dataclasses.dataclass
+class MergeStats:
+    rewritten: int = 0
+    passed_through: int = 0
+
+
+def merge_narrations(
+        entries: list[Directive],
+        comment_narrations: dict[str, dict[int, str]],
+        stats: Optional[MergeStats] = None,
+) -> list[Directive]:
+    ret = []
+    rewritten = 0
+    for entry in entries:
+        merged_entry = merge_narration(entry, comment_narrations)
+        if merged_entry is not entry:
+            rewritten += 1
+        ret.append(merged_entry)
+    if stats is not None:
+        stats.rewritten += rewritten
+        stats.passed_through += len(entries) - rewritten
+    return ret
 
 
 def merge_narration(entry: Directive, comment_narrations: dict[str, dict[int, str]]) -> Directive:
+    """Merges narration into a transaction.
+
+    The original entry is returned as is if nothing changes. Otherwise a new transaction is built without modifying
+    the original one.
+    """
     if not isinstance(entry, Transaction):
         return entry
-    narrations = []
-    for posting in entry.postings:
-        if posting.meta:
-            narration = posting.meta.get('narration')
-            comment_narration = comment_narrations[posting.meta.get('filename')].get(posting.meta.get('lineno'))
-            if narration is None and comment_narration:
-                posting.meta['narration'] = comment_narration
-                narration = comment_narration
-            if narration:
-                narrations.append(narration.strip())
-    if entry.narration:
+    # decide what changes
+    narrations: Optional[list[str]] = None if entry.narration else []
+    posting_comment_narrations: Optional[dict[int, str]] = None
+    for i, posting in enumerate(entry.postings):
+        if not posting.meta:
+            continue
+        narration = posting.meta.get('narration')
+        if narration is None:
+            file_comment_narrations = comment_narrations.get(posting.meta.get('filename'))
+            if file_comment_narrations and (narration := file_comment_narrations.get(posting.meta.get('lineno'))):
+                if posting_comment_narrations is None:
+                    posting_comment_narrations = {}
+                posting_comment_narrations[i] = narration
+        if narration and narrations is not None:
+            narrations.append(narration.strip())
+    narration = entry.narration if narrations is None else ' | '.join(narrations)
+    if posting_comment_narrations is None and narration == entry.narration:
         return entry
-    return entry._replace(narration=' | '.join(narrations))
+    # rebuild what changes
+    postings = entry.postings
+    if posting_comment_narrations is not None:
+        postings = [
+            posting._replace(meta={**posting.meta, 'narration': posting_comment_narrations[i]})
+            if i in posting_comment_narrations else posting
+            for i, posting in enumerate(entry.postings)
+        ]
+    return entry._replace(narration=narration, postings=postings)
@@ -1,8 +1,64 @@
 import os.path
-from autobean.narration import plugin
-from autobean.utils.plugin_test_utils import generate_tests
+import pathlib
+from typing import Optional
+import pytest
+from beancount.core.data import filter_txns
+from autobean.narration import cache, comments, plugin
+from autobean.narration.plugin import MergeStats, merge_narrations, parse_config, read_comment_narrations
+from autobean.utils.plugin_test_utils import generate_tests, load_ledger
 
 
 @generate_tests(os.path.dirname(__file__), plugin)
 def test() -> None:
     pass
+
+
+def test_read_comment_narrations_concurrently(tmp_path: pathlib.Path) -> None:
+    linenos_by_file = {}
+    for i in range(20):
+        path = tmp_path / f'{i}.bean'
+        path.write_text(f'a ;; foo{i}\nb\nc ;; bar{i}\n')
+        linenos_by_file[str(path)] = {1, 2, 3}
+
+    sequential = read_comment_narrations(cache.NarrationCache(), linenos_by_file)
+    concurrent = read_comment_narrations(cache.NarrationCache(), linenos_by_file, max_workers=4)
+
+    assert concurrent == sequential
+    assert list(concurrent) == list(linenos_by_file)
+
+
+@pytest.mark.parametrize('config,expected', [
+    (None, (None, None)),
+    ('{}', (None, None)),
+    ("{'cache': 'foo', 'max_workers': 4}", ('foo', 4)),
+])
+def test_parse_config(config: Optional[str], expected: tuple[Optional[str], Optional[int]]) -> None:
+    assert parse_config(config) == expected
+
+
+@pytest.mark.parametrize('config', [
+    'foo',
+    "{'foo': 1}",
+    "{'cache': 1}",
+    "{'max_workers': 0}",
+])
+def test_parse_config_invalid(config: str) -> None:
+    with pytest.raises(ValueError):
+        parse_config(config)
+
+
+def test_merge_narrations_passes_through_unchanged() -> None:
+    source_path = os.path.join(os.path.dirname(__file__), 'comments', 'source.bean')
+    ledger = load_ledger(source_path)
+    comment_narrations = {source_path: comments.extract_from_file(source_path)}
+    original_metas = [
+        dict(posting.meta) for entry in filter_txns(ledger.entries) for posting in entry.postings]
+
+    stats = MergeStats()
+    entries = merge_narrations(ledger.entries, comment_narrations, stats)
+
+    rewritten = [entry for entry, original in zip(entries, ledger.entries) if entry is not original]
+    assert [entry.date.day for entry in rewritten] == [1, 2, 3, 4, 6, 8]
+    assert stats == MergeStats(rewritten=6, passed_through=len(ledger.entries) - 6)
+    assert original_metas == [
+        posting.meta for entry in filter_txns(ledger.entries) for posting in entry.postings]
@@ -1,4 +1,5 @@
 from typing import Any, Iterable, Optional
+import itertools
 import os.path
 from beancount.core.data import Custom, Directive, Open, Close, entry_sortkey
 from beancount import loader
@@ -6,7 +7,7 @@ from autobean.utils import error_lib, plugin_lib
 from . import link_accounts
 
 
-@plugin_lib.plugin('autobean.share.include')
+@plugin_lib.plugin('autobean.share.include', barrier=True)
 class IncludePlugin(plugin_lib.BasePlugin):
 
     def process(self, entries: list[Directive], options: dict[str, Any], arg: Optional[str]) -> Iterable[Directive]:
@@ -15,9 +16,9 @@ class IncludePlugin(plugin_lib.BasePlugin):
         self._entries_by_file = dict[str, list[Directive]]()
         self._links = list[link_accounts.Link]()
         entries = list(super().process(entries, options, arg))
-        entries += link_accounts.link_accounts(
+        included_entries = link_accounts.link_accounts(
             self._entries_by_file, self._links, self._error_logger)
-        entries = deduplicate_open_close(entries)
+        entries = deduplicate_open_close([entries, *included_entries])
         options['include'] = list(self._includes)
         return entries
 
@@ -58,16 +59,24 @@ class IncludePlugin(plugin_lib.BasePlugin):
         return ()
 
 
-def deduplicate_open_close(entries: list[Directive]) -> list[Directive]:
-    """Deduplicates Open / Close directives.
-    
+def deduplicate_open_close(entries_list: Iterable[list[Directive]]) -> list[Directive]:
+    """Merges sorted lists of entries and deduplicates Open / Close directives.
+
+    Each list must already be sorted by `entry_sortkey`, which holds for loader outputs. A single non-empty list is used
+    as is. Otherwise they are sorted together, which timsort performs as a merge of the presorted runs.
+
     This deduplicates Open / Close directives in a simple way because duplication inside each file should have been
     caught during loading.
     """
     results = []
     opened_accounts = set()
     closed_accounts = set()
-    for entry in sorted(entries, key=entry_sortkey):
+    non_empty_entries_list = [entries for entries in entries_list if entries]
+    if len(non_empty_entries_list) == 1:
+        merged_entries = non_empty_entries_list[0]
+    else:
+        merged_entries = sorted(itertools.chain.from_iterable(non_empty_entries_list), key=entry_sortkey)
+    for entry in merged_entries:
         if isinstance(entry, Open):
             if entry.account not in opened_accounts:
                 opened_accounts.add(entry.account)
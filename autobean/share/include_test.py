@@ -0,0 +1,45 @@
+import textwrap
+from beancount.core.data import Directive, Open, Close, entry_sortkey
+from beancount.parser import parser
+from . import include
+
+
+def _parse(text: str, filename: str) -> list[Directive]:
+    entries, errors, _ = parser.parse_string(textwrap.dedent(text), filename)
+    assert not errors
+    return sorted(entries, key=entry_sortkey)
+
+
+def test_deduplicate_open_close() -> None:
+    entries1 = _parse('''
+        2000-01-01 open Assets:Foo
+        2000-01-03 *
+            Assets:Foo  1.00 USD
+            Assets:Bar -1.00 USD
+        2000-01-05 close Assets:Foo
+    ''', 'a.bean')
+    entries2 = _parse('''
+        2000-01-01 open Assets:Foo
+        2000-01-02 open Assets:Bar
+        2000-01-04 *
+            Assets:Foo  2.00 USD
+            Assets:Bar -2.00 USD
+        2000-01-05 close Assets:Foo
+    ''', 'b.bean')
+
+    results = include.deduplicate_open_close([entries1, [], entries2])
+
+    assert results == sorted([*entries1, entries2[1], entries2[2]], key=entry_sortkey)
+    assert sum(isinstance(entry, Open) for entry in results) == 2
+    assert sum(isinstance(entry, Close) for entry in results) == 1
+
+
+def test_deduplicate_open_close_single() -> None:
+    entries = _parse('''
+        2000-01-01 open Assets:Foo
+        2000-01-03 *
+            Assets:Foo  1.00 USD
+            Assets:Bar -1.00 USD
+    ''', 'a.bean')
+
+    assert include.deduplicate_open_close([[], entries]) == entries
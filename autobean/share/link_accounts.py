@@ -28,8 +28,11 @@ class UnresolvedLinkError(error_lib.Error):
 def link_accounts(
         entries_by_file: dict[str, list[Directive]],
         links: Iterable[Link],
-        logger: error_lib.ErrorLogger) -> list[Directive]:
+        logger: error_lib.ErrorLogger) -> list[list[Directive]]:
+    """Resolves links and returns the resulting entries of each ledger.
 
+    Entries of each ledger remain in their original order.
+    """
     _check_links(entries_by_file, links, logger)
     edges = _build_graph(entries_by_file, links, logger)
     return _resolve_links(entries_by_file, edges, logger)
@@ -108,23 +111,29 @@ def _build_graph(
                         break
                     found = True
             if not complement_txn:
-                logger.log_error(UnresolvedLinkError(
+                logger.log_error_lazily(
+                    UnresolvedLinkError,
                     entry.meta,
-                    f'No complement transaction found for link {link}',
+                    'No complement transaction found for link {}',
+                    (link,),
                     entry,
-                ))
+                )
             elif complement_duplicated:
-                logger.log_error(UnresolvedLinkError(
+                logger.log_error_lazily(
+                    UnresolvedLinkError,
                     entry.meta,
-                    f'Multiple complement transactions found for link {link}',
+                    'Multiple complement transactions found for link {}',
+                    (link,),
                     entry,
-                ))
+                )
             elif duplicated:
-                logger.log_error(UnresolvedLinkError(
+                logger.log_error_lazily(
+                    UnresolvedLinkError,
                     complement_txn.meta,
-                    f'Multiple complement transactions found for link {link}',
+                    'Multiple complement transactions found for link {}',
+                    (link,),
                     complement_txn,
-                ))
+                )
             else:
                 edges[id(entry)].append((complement_txn, link.account))
                 edges[id(complement_txn)].append((entry, link.complement_account))
@@ -133,11 +142,13 @@ def _build_graph(
             complement_feature = _transaction_feature(
                 complement_txn, link.complement_account, False)
             if complement_feature[1] and id(complement_txn) not in edges:
-                logger.log_error(UnresolvedLinkError(
+                logger.log_error_lazily(
+                    UnresolvedLinkError,
                     complement_txn.meta,
-                    f'No complement transaction found for link {link}',
+                    'No complement transaction found for link {}',
+                    (link,),
                     complement_txn,
-                ))
+                )
 
     return edges
 
@@ -146,11 +157,13 @@ def _resolve_links(
         entries_by_file: dict[str, list[Directive]],
         edges: dict[int, list[tuple[Transaction, str]]],
         logger: error_lib.ErrorLogger,
-) -> list[Directive]:
-    ret = []
+) -> list[list[Directive]]:
+    ret_by_file = []
     all_visited = set()
     bad = set()
     for entries in entries_by_file.values():
+        ret = list[Directive]()
+        ret_by_file.append(ret)
         for entry in entries:
             if id(entry) in all_visited:
                 continue
@@ -176,7 +189,7 @@ def _resolve_links(
             else:
                 ret.append(entry)
                 bad.update(visited)
-    return ret
+    return ret_by_file
 
 
 def _transaction_feature(
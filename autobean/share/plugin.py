@@ -1,19 +1,19 @@
 import collections
 import decimal
+import os.path
 import re
 from typing import Any, Iterable, Iterator, Optional
 from beancount.core import flags, account as account_lib
 from beancount.core.data import Balance, Custom, Directive, Open, Pad, Transaction, new_metadata
 from beancount.core.amount import Amount
-from beancount.ops import pad, validation
 from autobean.utils import error_lib, plugin_lib
-from . import include, include_context, policy_lib, split_account
+from . import include, include_context, policy_lib, split_account, split_memo
 
 _DEFAULT_RECEIVABLE_ACCOUNT = 'Assets:Receivables'
 _SUBACCOUNT_REGEX = re.compile(r':\[.*\]$')
 
 
-@plugin_lib.plugin('autobean.share', param_type=str, custom_scope=r'autobean\.share($|\..*)')
+@plugin_lib.plugin('autobean.share', param_type=str, custom_scope=r'autobean\.share($|\..*)', barrier=True)
 class Plugin(plugin_lib.BasePlugin):
 
     def process(self, entries: list[Directive], options: dict[str, Any], arg: Optional[str]) -> Iterable[Directive]:
@@ -24,6 +24,10 @@ class Plugin(plugin_lib.BasePlugin):
         self._opened_accounts = set[str]()
         self._opened_account_ancestors = set[str]()
         self._receivable_account = _DEFAULT_RECEIVABLE_ACCOUNT
+        self._split_memo: Optional[split_memo.SplitMemo] = None
+        self._options = options
+        # heavy beancount.ops modules are imported on first use
+        from beancount.ops import validation
         errors = validation.validate(entries, options)
         self._error_logger.log_errors(errors)
 
@@ -42,10 +46,13 @@ class Plugin(plugin_lib.BasePlugin):
             self._is_top_level = effective_context is context
             entries = list(super().process(entries, options, arg))
             if self._has_deferred_pad:
+                from beancount.ops import pad
                 entries, errors = pad.pad(entries, options)
                 self._error_logger.log_errors(errors)
             if self._is_top_level:
                 entries = self._account_splitter.process_open_close(entries)
+            if self._split_memo is not None:
+                self._split_memo.save()
             return entries
 
     def _check_enabled(self, entry: Custom) -> None:
@@ -94,6 +101,14 @@ class Plugin(plugin_lib.BasePlugin):
         self._receivable_account = account
         return ()
 
+    @plugin_lib.handle_custom('autobean.share.cache', 'exactly one path')
+    def handle_cache(self, entry: Custom, path: str) -> Iterable[Directive]:
+        self._check_enabled(entry)
+        path = os.path.join(os.path.dirname(entry.meta['filename']), path)
+        self._split_memo = split_memo.get_memo(self._options, path)
+        self._account_splitter.set_memo(self._split_memo)
+        return ()
+
     @plugin_lib.handle_custom('autobean.share.policy', 'exactly one name or account')
     def handle_policy_def(self, entry: Custom, name: str | plugin_lib.Account) -> Iterable[Directive]:
         self._check_enabled(entry)
@@ -107,7 +122,7 @@ class Plugin(plugin_lib.BasePlugin):
 
     @plugin_lib.handle_custom('autobean.share.balance', 'an account and an amount')
     def handle_deferred_balance(self, entry: Custom, account: plugin_lib.Account, amount: Amount) -> Iterator[Directive]:
-        return self.handle_deferred_balance_tolerance(account, amount, None)
+        return self.handle_deferred_balance_tolerance(entry, account, amount, None)
 
     @plugin_lib.handle_custom('autobean.share.balance', 'an account, an amount and a tolerance')
     def handle_deferred_balance_tolerance(self, entry: Custom, account: plugin_lib.Account | str, amount: Amount, tolerance: Optional[decimal.Decimal]) -> Iterator[Directive]:
@@ -118,9 +133,12 @@ class Plugin(plugin_lib.BasePlugin):
         if not self._is_generated_account(account):
             raise error_lib.PluginException(f'autobean.share.balance must only be used on generated accounts')
         yield Balance(
+            meta=entry.meta,
+            date=entry.date,
             account=account,
             amount=amount,
             tolerance=tolerance,
+            diff_amount=None,
         )
 
     @plugin_lib.handle_custom('autobean.share.pad', 'an account and an source account')
@@ -133,6 +151,8 @@ class Plugin(plugin_lib.BasePlugin):
             raise error_lib.PluginException(f'autobean.share.pad must only be used on generated accounts')
         self._has_deferred_pad = True
         yield Pad(
+            meta=entry.meta,
+            date=entry.date,
             account=account,
             source_account=source_account,
         )
@@ -199,3 +219,4 @@ def get_asserted_accounts(entries: Iterable[Directive]) -> set[str]:
                 isinstance(entry.values[0].value, str)):
             accounts.add(entry.values[0].value)
     return accounts
+
@@ -1,6 +1,5 @@
-import dataclasses
 import decimal
-import functools
+import weakref
 from typing import Any, Generic, Optional, TypeVar
 from beancount.core import account as beancount_account
 from beancount.core.data import Balance, Custom, Posting
@@ -9,6 +8,7 @@ from autobean.utils import error_lib
 _T = TypeVar('_T')
 _U = TypeVar('_U')
 _O = TypeVar('_O', bound='Ownership')
+_I = TypeVar('_I', bound='_Interned')
 
 
 class _SpecialMeta:
@@ -21,50 +21,148 @@ class _SpecialMeta:
 
 
 class Ownership:
-    pass
-
-
-@dataclasses.dataclass(frozen=True)
-class WeightedOwnership(Ownership):
+    __slots__ = ()
+
+
+class _Interned:
+    """Immutable value type whose equal instances are shared.
+
+    Instances with the same key are the same object for as long as any of them is alive, so that caches can key on
+    them cheaply.
+    """
+    __slots__ = ('_key', '_hash', '__weakref__')
+    _FIELDS: tuple[str, ...]
+    _instances: 'weakref.WeakValueDictionary[tuple, Any]'
+    _key: tuple
+    _hash: int
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._instances = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _create(cls: type[_I], key: tuple, **fields: Any) -> _I:
+        instance = object.__new__(cls)
+        for name, value in fields.items():
+            object.__setattr__(instance, name, value)
+        object.__setattr__(instance, '_key', key)
+        object.__setattr__(instance, '_hash', hash(key))
+        cls._instances[key] = instance
+        return instance
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, _Interned) or type(other) is not type(self):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple[type, tuple]:
+        return type(self), tuple(getattr(self, name) for name in self._FIELDS)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._FIELDS)
+        return f'{type(self).__name__}({fields})'
+
+
+class WeightedOwnership(_Interned, Ownership):
+    __slots__ = ('weights', 'total_weight')
+    _FIELDS = ('weights',)
+    # must not be modified
     weights: dict[str, decimal.Decimal]
+    total_weight: decimal.Decimal
 
-    @functools.cached_property
-    def total_weight(self) -> decimal.Decimal:
-        return sum(self.weights.values(), decimal.Decimal(0))
+    def __new__(cls, weights: dict[str, decimal.Decimal]) -> 'WeightedOwnership':
+        # order and exponents of weights are visible in split postings
+        key = tuple((party, weight, weight.as_tuple().exponent) for party, weight in weights.items())
+        if (instance := cls._instances.get(key)) is not None:
+            return instance
+        return cls._create(
+            key,
+            weights=dict(weights),
+            total_weight=sum(weights.values(), decimal.Decimal(0)))
 
 
 class ProratedOwnership(Ownership):
-    pass
+    __slots__ = ()
+
+    def __reduce__(self) -> str:
+        # unpickled as the singleton, which is compared by identity
+        return '_PRORATED'
 
 
 _PRORATED = ProratedOwnership()
 
 
-@dataclasses.dataclass(frozen=True)
-class Policy(Generic[_O]):
+class Policy(_Interned, Generic[_O]):
+    __slots__ = ('ownership', 'enforced', 'conversion', 'prorated_included')
+    _FIELDS = __slots__
     ownership: _O
     enforced: bool
     conversion: bool
     prorated_included: bool
 
-
-@dataclasses.dataclass(frozen=True)
-class PolicyDefinition:
+    def __new__(cls, ownership: _O, enforced: bool, conversion: bool, prorated_included: bool) -> 'Policy[_O]':
+        key = (ownership, enforced, conversion, prorated_included)
+        if (instance := cls._instances.get(key)) is not None:
+            return instance
+        return cls._create(
+            key,
+            ownership=ownership,
+            enforced=enforced,
+            conversion=conversion,
+            prorated_included=prorated_included)
+
+
+class PolicyDefinition(_Interned):
+    __slots__ = ('parent', 'ownership', 'enforced', 'conversion', 'prorated_included', '_policy', '_overrides')
+    _FIELDS = ('parent', 'ownership', 'enforced', 'conversion', 'prorated_included')
     parent: Optional[str]
     ownership: Optional[Ownership]
     enforced: Optional[bool]
     conversion: Optional[bool]
     prorated_included: Optional[bool]
+    _policy: Optional[Policy]
+    # (parent, is_ephemeral) -> this definition overriding parent
+    _overrides: dict[tuple['PolicyDefinition', bool], 'PolicyDefinition']
+
+    def __new__(
+            cls,
+            parent: Optional[str],
+            ownership: Optional[Ownership],
+            enforced: Optional[bool],
+            conversion: Optional[bool],
+            prorated_included: Optional[bool],
+    ) -> 'PolicyDefinition':
+        key = (parent, ownership, enforced, conversion, prorated_included)
+        if (instance := cls._instances.get(key)) is not None:
+            return instance
+        policy = None
+        if ownership and enforced is not None and conversion is not None and prorated_included is not None:
+            policy = Policy(
+                ownership=ownership,
+                enforced=enforced,
+                conversion=conversion,
+                prorated_included=prorated_included,
+            )
+        return cls._create(
+            key,
+            parent=parent,
+            ownership=ownership,
+            enforced=enforced,
+            conversion=conversion,
+            prorated_included=prorated_included,
+            _policy=policy,
+            _overrides={})
 
     def as_policy(self) -> Optional[Policy]:
-        if not self.ownership or self.enforced is None or self.conversion is None or self.prorated_included is None:
-            return None
-        return Policy(
-            ownership=self.ownership,
-            enforced=self.enforced,
-            conversion=self.conversion,
-            prorated_included=self.prorated_included,
-        )
+        return self._policy
 
 
 _ROOT_POLICY = PolicyDefinition(
@@ -142,11 +240,13 @@ class PolicyDatabase:
     _named_policies: dict[str, PolicyDefinition]
     _account_policies: dict[str, PolicyDefinition]
     _wildcard_account_policies: dict[str, PolicyDefinition]
+    _account_policy_cache: dict[str, Optional[PolicyDefinition]]
 
     def __init__(self) -> None:
         self._named_policies = {}
         self._account_policies = {}
         self._wildcard_account_policies = {}
+        self._account_policy_cache = {}
 
     def add_policy(self, name: str, policy_def: PolicyDefinition) -> None:
         if policy_def.parent and policy_def.parent not in self._named_policies:
@@ -155,6 +255,7 @@ class PolicyDatabase:
         if policy_def.enforced and not policy_def.ownership:
             raise error_lib.PluginException(
                 f'Policy with share_enforced must define ownership')
+        self._account_policy_cache.clear()
         if name.endswith(':*'):
             prefix = name.removesuffix(':*')
             self._wildcard_account_policies[prefix] = policy_def
@@ -167,6 +268,15 @@ class PolicyDatabase:
             self._named_policies[name] = policy_def
 
     def _get_account_policy_definition(self, account: str) -> Optional[PolicyDefinition]:
+        try:
+            return self._account_policy_cache[account]
+        except KeyError:
+            pass
+        policy_def = self._resolve_account_policy_definition(account)
+        self._account_policy_cache[account] = policy_def
+        return policy_def
+
+    def _resolve_account_policy_definition(self, account: str) -> Optional[PolicyDefinition]:
         policy_def = None
         for parent in reversed(list(beancount_account.parents(account))):
             if wildcard_policy_def := self._wildcard_account_policies.get(parent):
@@ -255,6 +365,20 @@ def _override_policy_def(
 ) -> PolicyDefinition:
     if parent is None:
         return policy_def
+    # definitions are interned so that overrides are resolved once for each combination, and only kept for as long as
+    # the overriding definition is
+    key = (parent, is_ephemeral)
+    if (ret := policy_def._overrides.get(key)) is None:
+        ret = policy_def._overrides[key] = _resolve_override(policy_def, parent, is_ephemeral=is_ephemeral)
+    return ret
+
+
+def _resolve_override(
+        policy_def: PolicyDefinition,
+        parent: PolicyDefinition,
+        *,
+        is_ephemeral: bool,
+) -> PolicyDefinition:
     if is_ephemeral:
         if parent.enforced and policy_def.ownership:
             raise error_lib.PluginException(
@@ -1,5 +1,7 @@
 import decimal
+import gc
 import textwrap
+import weakref
 from typing import Any, Callable, Iterator, Optional, TypeVar
 from beancount.parser import parser
 from beancount.core.data import Balance, Custom, Directive, Transaction
@@ -43,6 +45,40 @@ def test_parse_weighted(txn: Transaction) -> None:
     assert policy_def.prorated_included is None
 
 
+def test_weighted_ownership_interned() -> None:
+    ownership = policy_lib.WeightedOwnership({'Alice': decimal.Decimal(1), 'Bob': decimal.Decimal('1.5')})
+    assert policy_lib.WeightedOwnership({'Alice': decimal.Decimal(1), 'Bob': decimal.Decimal('1.5')}) is ownership
+    assert hash(ownership) == hash(policy_lib.WeightedOwnership(dict(ownership.weights)))
+    # equal in value but distinguishable in split postings
+    assert policy_lib.WeightedOwnership({'Alice': decimal.Decimal('1.0'), 'Bob': decimal.Decimal('1.5')}) != ownership
+    assert policy_lib.WeightedOwnership({'Bob': decimal.Decimal('1.5'), 'Alice': decimal.Decimal(1)}) != ownership
+    with pytest.raises(AttributeError):
+        ownership.total_weight = decimal.Decimal(0)  # type: ignore[misc]
+
+
+def test_policy_definition_interned() -> None:
+    ownership = policy_lib.WeightedOwnership({'Alice': decimal.Decimal(1)})
+    policy_def = policy_lib.PolicyDefinition(
+        parent=None, ownership=ownership, enforced=False, conversion=True, prorated_included=True)
+    assert policy_lib.PolicyDefinition(
+        parent=None, ownership=ownership, enforced=False, conversion=True, prorated_included=True) is policy_def
+    policy = policy_def.as_policy()
+    assert policy is policy_lib.Policy(
+        ownership=ownership, enforced=False, conversion=True, prorated_included=True)
+
+
+def test_policy_definition_released() -> None:
+    ownership = policy_lib.WeightedOwnership({'Alice': decimal.Decimal('0.125')})
+    policy_def = policy_lib.PolicyDefinition(
+        parent=None, ownership=ownership, enforced=None, conversion=None, prorated_included=None)
+    overridden = policy_lib._override_policy_def(policy_def, policy_lib._ROOT_POLICY, is_ephemeral=False)
+    assert policy_lib._override_policy_def(policy_def, policy_lib._ROOT_POLICY, is_ephemeral=False) is overridden
+    ref = weakref.ref(overridden)
+    del ownership, policy_def, overridden
+    gc.collect()
+    assert ref() is None
+
+
 @_parse_doc(Transaction)
 def test_parse_options_prorated(txn: Transaction) -> None:
     """
@@ -1,16 +1,19 @@
+import abc
 import collections
 import dataclasses
 import decimal
 import functools
 import itertools
-from typing import Any, Iterator, Optional, TypeVar
-from beancount.core import account as account_lib, amount as amount_lib, inventory as inventory_lib, convert, interpolate, realization
+from typing import TYPE_CHECKING, Any, Hashable, Iterator, Optional, TypeVar
+from beancount.core import account as account_lib, amount as amount_lib, inventory as inventory_lib, convert, interpolate
 from beancount.core.data import Balance, Close, Custom, Directive, Open, Posting, Transaction
 from beancount.core.amount import Amount
 from beancount.core.position import Cost, CostSpec
-from beancount.ops import balance as balance_lib
-from autobean.utils import error_lib
-from . import policy_lib, viewpoint_lib
+from autobean.utils import error_lib, fingerprint
+from . import policy_lib, split_memo, viewpoint_lib
+
+if TYPE_CHECKING:
+    from beancount.core import realization
 
 # TODO: consider determining the tolerance in a better way
 _PROPORTIONATE_TOLERANCE = decimal.Decimal(1e-6)
@@ -58,25 +61,35 @@ def _get_complement_posting(posting: Posting) -> Posting:
     return posting._replace(units=units, price=None, cost=None)
 
 
+def _get_posting_policies(
+        transaction: Transaction,
+        policy_db: policy_lib.PolicyDatabase,
+) -> list[policy_lib.Policy]:
+    transaction_policy_def = policy_lib.try_parse_policy_definition(transaction.meta)
+    policy_lib.strip_share_meta(transaction.meta)
+    policies = []
+    for posting in transaction.postings:
+        policy = policy_db.get_posting_policy(posting, transaction_policy_def)
+        if policy is None:
+            raise error_lib.PluginException('No applicable share policy')
+        policies.append(policy)
+    return policies
+
+
 @dataclasses.dataclass(frozen=True)
 class _GroupedPostings:
     weighted: list[_PostingPolicy[policy_lib.WeightedOwnership]]
     prorated: list[_PostingPolicy[policy_lib.ProratedOwnership]]
 
     @classmethod
-    def from_transaction(
+    def from_policies(
             cls,
-            transaction: Transaction,
-            policy_db: policy_lib.PolicyDatabase,
+            postings: list[Posting],
+            policies: list[policy_lib.Policy],
     ) -> '_GroupedPostings':
-        transaction_policy_def = policy_lib.try_parse_policy_definition(transaction.meta)
-        policy_lib.strip_share_meta(transaction.meta)
         weighted_postings_policies = list[_PostingPolicy[policy_lib.WeightedOwnership]]()
         prorated_postings_policies = list[_PostingPolicy[policy_lib.ProratedOwnership]]()
-        for posting in transaction.postings:
-            policy = policy_db.get_posting_policy(posting, transaction_policy_def)
-            if policy is None:
-                raise error_lib.PluginException('No applicable share policy')
+        for posting, policy in zip(postings, policies):
             if isinstance(policy.ownership, policy_lib.WeightedOwnership):
                 weighted_postings_policies.append((posting, policy))
             elif isinstance(policy.ownership, policy_lib.ProratedOwnership):
@@ -229,69 +242,58 @@ class _ProratedOwnershipBuilder:
         return policy_lib.WeightedOwnership(self._weights)
 
 
-class _TransactionProcessor:
+class _AccountNames:
+    """Interns generated account names, which would otherwise be formatted again for every posting."""
+
+    def __init__(self) -> None:
+        self._parents = dict[str, str]()
+        self._children = collections.defaultdict[str, dict[str, str]](dict)
+        self._subaccounts = collections.defaultdict[str, dict[str, str]](dict)
+
+    def parent(self, account: str) -> str:
+        if (parent := self._parents.get(account)) is None:
+            parent = self._parents[account] = account.rpartition(':')[0]
+        return parent
+
+    def child(self, account: str, party: str) -> str:
+        """Returns `{account}:{party}`, e.g. receivable accounts."""
+        children = self._children[account]
+        if (child := children.get(party)) is None:
+            child = children[party] = f'{account}:{party}'
+        return child
+
+    def subaccount(self, account: str, party: str) -> str:
+        """Returns `{account}:[{party}]`."""
+        subaccounts = self._subaccounts[account]
+        if (subaccount := subaccounts.get(party)) is None:
+            subaccount = subaccounts[party] = f'{account}:[{party}]'
+        return subaccount
+
+
+class _SplitTransaction(abc.ABC):
+    """Postings of a transaction split by party, from which postings of any viewpoint are derived."""
+
     def __init__(
             self,
             *,
             transaction: Transaction,
-            policy_db: policy_lib.PolicyDatabase,
-            options: dict[str, Any],
             receivable_account: str,
+            account_names: _AccountNames,
     ) -> None:
         self._transaction = transaction
         self._receivable_account = receivable_account
-        self._tolerance = interpolate.infer_tolerances(self._transaction.postings, options)
+        self._account_names = account_names
         self._postings_by_party = collections.defaultdict[str, list[Posting]](list)
-        self._inventory_by_party = collections.defaultdict[str, _Inventory](_Inventory)
         # complement receivable postings generated from explicit postings on receivables
         self._complement_receivables = collections.defaultdict[str, list[Posting]](list)
 
-        grouped_postings = _GroupedPostings.from_transaction(transaction, policy_db)
-        self._conversion_table = _ConversionTable.from_grouped_postings(grouped_postings)
-        self._process_transaction(grouped_postings)
-
-    def _add_weighted_posting(
-            self,
-            posting: Posting,
-            ownership: policy_lib.WeightedOwnership,
-    ) -> dict[str, Posting]:
-        policy_lib.strip_share_meta(posting.meta)
-        complement = _get_complement_posting(posting)
-        party_postings = _split_posting_weighted(posting, ownership)
-        for party, posting in party_postings.items():
-            self._postings_by_party[party].append(posting)
-        complement_party_postings = _split_posting_weighted(complement, ownership)
-        for party, posting in complement_party_postings.items():
-            self._inventory_by_party[party].add_posting(posting)
-        parent, _, receivable_party = posting.account.rpartition(':')
-        if parent == self._receivable_account:
-            for party, posting in party_postings.items():
-                self._complement_receivables[receivable_party].append(posting._replace(
-                    account=f'{self._receivable_account}:{party}',
-                    units=-posting.units,
-                ))
-        return party_postings
-
-    def _process_transaction(
-            self,
-            grouped_postings: _GroupedPostings,
-    ) -> None:
-        prorated_ownership_builder = _ProratedOwnershipBuilder()
-        for posting, weighted_policy in grouped_postings.weighted:
-            party_postings = self._add_weighted_posting(posting, weighted_policy.ownership)
-            if grouped_postings.prorated and weighted_policy.prorated_included:
-                prorated_ownership_builder.check_currency(posting.units.currency)
-                prorated_ownership_builder.add_postings(party_postings)
-        if grouped_postings.prorated:
-            prorated_ownership = prorated_ownership_builder.build()
-            for posting, _ in grouped_postings.prorated:
-                self._add_weighted_posting(posting, prorated_ownership)
-
-    def realize(self, root: realization.RealAccount, accounts: set[str]) -> None:
+    def realize(self, root: 'realization.RealAccount', accounts: set[str]) -> None:
+        from beancount.core import realization
+        get_or_create = realization.get_or_create
         for party, postings in self._postings_by_party.items():
             for posting in postings:
                 if posting.account in accounts:
-                    real_account = realization.get_or_create(root, f'{posting.account}:{party}')
+                    real_account = get_or_create(root, self._account_names.child(posting.account, party))
                     real_account.balance.add_position(posting)
 
     def get_postings(
@@ -327,32 +329,173 @@ class _TransactionProcessor:
     ) -> Iterator[Posting]:
         for party, postings in self._postings_by_party.items():
             for posting in postings:
-                account = posting.account
-                parent, _, _ = account.rpartition(':')
-                if parent != self._receivable_account:
-                    account = f'{posting.account}:[{party}]'
+                if self._account_names.parent(posting.account) != self._receivable_account:
+                    account = self._account_names.subaccount(posting.account, party)
                     used_subaccounts[posting.account].add(account)
                     yield posting._replace(account=account)
                 else:
                     yield posting
 
+    @abc.abstractmethod
+    def _get_complement_postings(
+            self,
+            *,
+            excluded_party: Optional[str] = None) -> list[Posting]:
+        """Returns postings balancing the split postings of all parties but `excluded_party`."""
+
+
+class _TransactionProcessor(_SplitTransaction):
+    def __init__(
+            self,
+            *,
+            transaction: Transaction,
+            policies: list[policy_lib.Policy],
+            options: dict[str, Any],
+            receivable_account: str,
+            account_names: _AccountNames,
+    ) -> None:
+        super().__init__(
+            transaction=transaction,
+            receivable_account=receivable_account,
+            account_names=account_names)
+        self._tolerance = interpolate.infer_tolerances(self._transaction.postings, options)
+        self._inventory_by_party = collections.defaultdict[str, _Inventory](_Inventory)
+
+        grouped_postings = _GroupedPostings.from_policies(transaction.postings, policies)
+        self._conversion_table = _ConversionTable.from_grouped_postings(grouped_postings)
+        self._process_transaction(grouped_postings)
+
+    def _add_weighted_posting(
+            self,
+            posting: Posting,
+            ownership: policy_lib.WeightedOwnership,
+    ) -> dict[str, Posting]:
+        policy_lib.strip_share_meta(posting.meta)
+        complement = _get_complement_posting(posting)
+        party_postings = _split_posting_weighted(posting, ownership)
+        for party, posting in party_postings.items():
+            self._postings_by_party[party].append(posting)
+        complement_party_postings = _split_posting_weighted(complement, ownership)
+        for party, posting in complement_party_postings.items():
+            self._inventory_by_party[party].add_posting(posting)
+        if self._account_names.parent(posting.account) == self._receivable_account:
+            receivable_party = posting.account[len(self._receivable_account) + 1:]
+            for party, posting in party_postings.items():
+                self._complement_receivables[receivable_party].append(posting._replace(
+                    account=self._account_names.child(self._receivable_account, party),
+                    units=-posting.units,
+                ))
+        return party_postings
+
+    def _process_transaction(
+            self,
+            grouped_postings: _GroupedPostings,
+    ) -> None:
+        prorated_ownership_builder = _ProratedOwnershipBuilder()
+        for posting, weighted_policy in grouped_postings.weighted:
+            party_postings = self._add_weighted_posting(posting, weighted_policy.ownership)
+            if grouped_postings.prorated and weighted_policy.prorated_included:
+                prorated_ownership_builder.check_currency(posting.units.currency)
+                prorated_ownership_builder.add_postings(party_postings)
+        if grouped_postings.prorated:
+            prorated_ownership = prorated_ownership_builder.build()
+            for posting, _ in grouped_postings.prorated:
+                self._add_weighted_posting(posting, prorated_ownership)
+
     def _get_complement_postings(
             self,
             *,
             excluded_party: Optional[str] = None) -> list[Posting]:
+        return [
+            posting
+            for party, inventory in self._inventory_by_party.items()
+            if party != excluded_party
+            for posting in self._get_party_complement_postings(party, inventory)
+        ]
+
+    def _get_party_complement_postings(self, party: str, inventory: _Inventory) -> list[Posting]:
+        if inventory.is_small(self._tolerance):
+            return []
         return [
             self._conversion_table.create_complement_posting(
-                account=f'{self._receivable_account}:{party}',
+                account=self._account_names.child(self._receivable_account, party),
                 number=number,
                 currency=currency,
                 price=price,
                 cost=cost,
                 meta=self._transaction.meta)
-            for party, inventory in self._inventory_by_party.items()
-            if party != excluded_party and not inventory.is_small(self._tolerance)
             for (currency, price, cost), number in inventory.positions.items()
         ]
 
+    def to_record(self, policy_fingerprint: Hashable) -> Optional[split_memo.SplitRecord]:
+        """Returns the split postings with metadata replaced with where it comes from, if it can be told."""
+        meta_indices = {id(posting.meta): i for i, posting in enumerate(self._transaction.postings)}
+        meta_indices[id(self._transaction.meta)] = -1
+        if len(meta_indices) != len(self._transaction.postings) + 1:
+            return None  # shared metadata
+        try:
+            complement_postings = {
+                party: self._get_party_complement_postings(party, inventory)
+                for party, inventory in self._inventory_by_party.items()
+            }
+        except error_lib.PluginException:
+            return None  # only relevant to some viewpoints, which are not memoized
+
+        def strip_meta(postings_by_party: dict[str, list[Posting]]) -> dict[str, list[Posting]]:
+            return {
+                party: [posting._replace(meta=meta_indices[id(posting.meta)]) for posting in postings]
+                for party, postings in postings_by_party.items()
+                if postings
+            }
+
+        return split_memo.SplitRecord(
+            policy_fingerprint=policy_fingerprint,
+            postings_by_party=strip_meta(self._postings_by_party),
+            complement_receivables=strip_meta(self._complement_receivables),
+            complement_postings=strip_meta(complement_postings),
+        )
+
+
+class _MemoizedSplit(_SplitTransaction):
+    def __init__(
+            self,
+            *,
+            transaction: Transaction,
+            record: split_memo.SplitRecord,
+            receivable_account: str,
+            account_names: _AccountNames,
+    ) -> None:
+        super().__init__(
+            transaction=transaction,
+            receivable_account=receivable_account,
+            account_names=account_names)
+        metas = [posting.meta for posting in transaction.postings]
+        metas.append(transaction.meta)
+        for meta in metas:
+            policy_lib.strip_share_meta(meta)
+
+        def restore_meta(postings_by_party: dict[str, list[Posting]]) -> dict[str, list[Posting]]:
+            # meta is the last field, and this is much cheaper than _replace
+            return {
+                party: [Posting(*posting[:-1], metas[posting.meta]) for posting in postings]
+                for party, postings in postings_by_party.items()
+            }
+
+        self._postings_by_party.update(restore_meta(record.postings_by_party))
+        self._complement_receivables.update(restore_meta(record.complement_receivables))
+        self._complement_postings = restore_meta(record.complement_postings)
+
+    def _get_complement_postings(
+            self,
+            *,
+            excluded_party: Optional[str] = None) -> list[Posting]:
+        return [
+            posting
+            for party, postings in self._complement_postings.items()
+            if party != excluded_party
+            for posting in postings
+        ]
+
 
 class AccountSplitter:
     def __init__(
@@ -366,22 +509,36 @@ class AccountSplitter:
         self._options = options
         self._viewpoint = viewpoint
         self._asserted_accounts = asserted_accounts
+        # beancount.core.realization is only imported once ledgers are processed
+        from beancount.core import realization
         self._real_root = realization.RealAccount('')
         self._used_subaccounts = collections.defaultdict[str, set[str]](set)
+        self._account_names = _AccountNames()
+        self._memo: Optional[split_memo.SplitMemo] = None
+
+    def set_memo(self, memo: split_memo.SplitMemo) -> None:
+        """Reuses split postings of transactions from the memo, whose policies have not changed since."""
+        self._memo = memo
 
     def process_transaction(self, transaction: Transaction, receivable_account: str) -> Optional[Transaction]:
-        processor = _TransactionProcessor(
-            transaction=transaction,
-            policy_db=self._policy_db,
-            options=self._options,
-            receivable_account=receivable_account)
+        policies = _get_posting_policies(transaction, self._policy_db)
+        split: _SplitTransaction
+        if self._memo is None:
+            split = _TransactionProcessor(
+                transaction=transaction,
+                policies=policies,
+                options=self._options,
+                receivable_account=receivable_account,
+                account_names=self._account_names)
+        else:
+            split = self._process_memoized_transaction(transaction, policies, receivable_account, self._memo)
         asserted_accounts = {
             posting.account
             for posting in transaction.postings
             if any(account in self._asserted_accounts for account in account_lib.parents(posting.account))
         }
-        processor.realize(self._real_root, asserted_accounts)
-        postings = processor.get_postings(
+        split.realize(self._real_root, asserted_accounts)
+        postings = split.get_postings(
             viewpoint=self._viewpoint,
             used_subaccounts=self._used_subaccounts)
         if transaction.postings and not postings:
@@ -390,10 +547,38 @@ class AccountSplitter:
         policy_lib.strip_share_meta(transaction.meta)
         return transaction._replace(postings=postings)
 
+    def _process_memoized_transaction(
+            self,
+            transaction: Transaction,
+            policies: list[policy_lib.Policy],
+            receivable_account: str,
+            memo: split_memo.SplitMemo,
+    ) -> _SplitTransaction:
+        key = fingerprint.fingerprint(transaction)
+        # postings are in order as split postings follow it
+        policy_fingerprint = (receivable_account, fingerprint.fingerprint_postings(transaction.postings), tuple(policies))
+        if record := memo.get(key, policy_fingerprint):
+            return _MemoizedSplit(
+                transaction=transaction,
+                record=record,
+                receivable_account=receivable_account,
+                account_names=self._account_names)
+        processor = _TransactionProcessor(
+            transaction=transaction,
+            policies=policies,
+            options=self._options,
+            receivable_account=receivable_account,
+            account_names=self._account_names)
+        if record := processor.to_record(policy_fingerprint):
+            memo.put(key, record)
+        return processor
+
     def process_balance(self, balance: Balance, error_logger: error_lib.ErrorLogger) -> list[Balance]:
         if self._viewpoint == viewpoint_lib.NOBODY:
             policy_lib.strip_share_meta(balance.meta)
             return [balance]
+        from beancount.core import realization
+        from beancount.ops import balance as balance_lib
         tolerance = balance_lib.get_balance_tolerance(balance, self._options)
         real_account = realization.get(self._real_root, balance.account)
         total_balance, balance_by_party = _compute_balance(real_account)
@@ -405,7 +590,7 @@ class AccountSplitter:
         if self._viewpoint == viewpoint_lib.EVERYONE:
             return [
                 balance._replace(
-                    account=f'{balance.account}:[{party}]',
+                    account=self._account_names.subaccount(balance.account, party),
                     amount=_amount_distrib(balance.amount, weight, policy.ownership.total_weight),
                 )
                 for party, weight in policy.ownership.weights.items()
@@ -450,10 +635,11 @@ class AccountSplitter:
         return results
 
 
-def _compute_balance(real_account: Optional[realization.RealAccount]) -> tuple[
+def _compute_balance(real_account: Optional['realization.RealAccount']) -> tuple[
         inventory_lib.Inventory,
         dict[str, inventory_lib.Inventory]
 ]:
+    from beancount.core import realization
     total_balance = inventory_lib.Inventory()
     balance_by_party = collections.defaultdict[str, inventory_lib.Inventory](
         inventory_lib.Inventory)
@@ -479,6 +665,7 @@ def _check_balance(
     diff_amount = amount_lib.sub(actual_amount, expected_amount)
     if abs(diff_amount.number) > tolerance:
         diff_direction = 'too much' if diff_amount.number > 0 else 'too little'
+        from beancount.ops import balance as balance_lib
         error_logger.log_error(balance_lib.BalanceError(
             balance.meta,
             f'Balance failed for {balance.account!r}: '
@@ -491,8 +678,9 @@ def _check_balance(
 def _check_proportionate(
         account: str,
         policy: policy_lib.Policy[policy_lib.WeightedOwnership],
-        real_root: realization.RealAccount,
+        real_root: 'realization.RealAccount',
 ) -> None:
+    from beancount.core import realization
     real_account = realization.get(real_root, account)
     if real_account is None:
         return  # empty account is by definition proportionate
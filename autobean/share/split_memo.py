@@ -0,0 +1,93 @@
+"""Memo of split transactions, so that unchanged transactions are not split again on every load."""
+
+import dataclasses
+import os
+import pickle
+from typing import Any, Hashable, Optional
+from beancount.core.data import Posting
+from autobean.utils import fingerprint
+
+_VERSION = 2
+# options affecting how transactions are split
+_OPTIONS = ('inferred_tolerance_default', 'inferred_tolerance_multiplier', 'infer_tolerance_from_cost')
+# Kept across runs so that reloading (e.g. in fava) does not read the file again.
+_MEMOS: dict[Optional[str], 'SplitMemo'] = {}
+
+
+@dataclasses.dataclass(frozen=True)
+class SplitRecord:
+    """Split postings of a transaction, regardless of the viewpoint.
+
+    Metadata of each posting is replaced with the index of the transaction posting it is derived from, or -1 for the
+    transaction itself, and is restored from the transaction on use.
+    """
+    # policies applicable to each posting, along with the receivable account and the order of postings
+    policy_fingerprint: Hashable
+    postings_by_party: dict[str, list[Posting]]
+    # by receivable party
+    complement_receivables: dict[str, list[Posting]]
+    complement_postings: dict[str, list[Posting]]
+
+
+class SplitMemo:
+    """Split records keyed on meta-excluded transaction fingerprints.
+
+    A record is only used if its policy fingerprint still matches, and is replaced otherwise. Records not used since
+    the last save are evicted on save, so the memo only holds transactions still in the ledger. It can optionally be
+    backed by a file so that it persists across processes.
+    """
+
+    def __init__(self, options_key: tuple, path: Optional[str] = None) -> None:
+        self._options_key = options_key
+        self._path = path
+        self._records = dict[fingerprint.Fingerprint, SplitRecord]()
+        self._used = dict[fingerprint.Fingerprint, SplitRecord]()
+        self._dirty = False
+        if path is not None:
+            self._load()
+
+    @property
+    def options_key(self) -> tuple:
+        return self._options_key
+
+    def get(self, key: fingerprint.Fingerprint, policy_fingerprint: Hashable) -> Optional[SplitRecord]:
+        record = self._records.get(key)
+        if record is None or record.policy_fingerprint != policy_fingerprint:
+            return None
+        self._used[key] = record
+        return record
+
+    def put(self, key: fingerprint.Fingerprint, record: SplitRecord) -> None:
+        self._records[key] = self._used[key] = record
+        self._dirty = True
+
+    def save(self) -> None:
+        if len(self._used) != len(self._records):
+            self._dirty = True
+        self._records, self._used = self._used, {}
+        if self._path is None or not self._dirty:
+            return
+        self._dirty = False
+        tmp_path = f'{self._path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((_VERSION, self._options_key, self._records), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path)
+
+    def _load(self) -> None:
+        assert self._path is not None
+        try:
+            with open(self._path, 'rb') as f:
+                version, options_key, records = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+            return
+        if version == _VERSION and options_key == self._options_key and isinstance(records, dict):
+            self._records = records
+
+
+def get_memo(options: dict[str, Any], path: Optional[str] = None) -> SplitMemo:
+    """Returns the split memo, optionally backed by the given file."""
+    options_key = tuple(options.get(name) for name in _OPTIONS)
+    memo = _MEMOS.get(path)
+    if memo is None or memo.options_key != options_key:
+        memo = _MEMOS[path] = SplitMemo(options_key, path)
+    return memo
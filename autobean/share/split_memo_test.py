@@ -0,0 +1,112 @@
+import pathlib
+import textwrap
+from typing import Any
+import pytest
+from beancount import loader
+from beancount.parser import printer
+from . import split_account, split_memo
+
+_LEDGER = '''
+    plugin "autobean.share" "{viewpoint}"
+
+    2000-01-01 custom "autobean.share.cache" "share.cache"
+    2000-01-01 custom "autobean.share.policy" "default"
+        share-Alice: 1
+    2000-01-01 open Assets:Bank
+    2000-01-01 open Assets:Receivables:Bob
+    2000-01-01 open Expenses:Food
+        share-Alice: {weight}
+        share-Bob: 1
+    2000-01-01 open Expenses:Tax
+        share_prorated: TRUE
+
+    2000-01-02 *
+        Assets:Bank  -30.00 USD
+        Expenses:Food  {food} USD
+        Expenses:Tax  10.00 USD
+    2000-01-03 *
+        Assets:Bank  -12.00 USD
+        Expenses:Food  12.00 USD
+            share-Bob: 3
+    2000-01-04 *
+        Assets:Receivables:Bob  -5.00 USD
+            share-Alice: 1
+        Assets:Receivables:Bob  5.00 USD
+            share-Carol: 1
+'''
+
+
+@pytest.fixture
+def processed(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Counts transactions split without the memo."""
+    monkeypatch.setattr(split_memo, '_MEMOS', {})
+    count = [0]
+
+    class CountingTransactionProcessor(split_account._TransactionProcessor):
+        def __init__(self, **kwargs: Any) -> None:
+            count[0] += 1
+            super().__init__(**kwargs)
+
+    monkeypatch.setattr(split_account, '_TransactionProcessor', CountingTransactionProcessor)
+    return count
+
+
+def _load(tmp_path: pathlib.Path, viewpoint: str, weight: int = 1, food: str = '20.00') -> list[str]:
+    path = tmp_path / 'ledger.bean'
+    path.write_text(textwrap.dedent(_LEDGER.format(viewpoint=viewpoint, weight=weight, food=food)))
+    entries, errors, _ = loader.load_file(str(path))
+    assert not errors
+    return [printer.format_entry(entry) for entry in entries]
+
+
+@pytest.mark.parametrize('viewpoint', ['Alice', 'Bob', 'everyone', 'nobody'])
+def test_memo_reused(tmp_path: pathlib.Path, processed: list[int], viewpoint: str) -> None:
+    # populated from another viewpoint
+    _load(tmp_path, 'Alice')
+    assert processed[0] == 3
+    assert (tmp_path / 'share.cache').exists()
+
+    processed[0] = 0
+    memoized = _load(tmp_path, viewpoint)
+    assert processed[0] == 0
+
+    # as if in a new process
+    split_memo._MEMOS.clear()
+    (tmp_path / 'share.cache').unlink()
+    assert _load(tmp_path, viewpoint) == memoized
+    assert processed[0] == 3
+
+
+def test_memo_persisted(tmp_path: pathlib.Path, processed: list[int]) -> None:
+    expected = _load(tmp_path, 'Alice')
+
+    split_memo._MEMOS.clear()
+    processed[0] = 0
+    assert _load(tmp_path, 'Alice') == expected
+    assert processed[0] == 0
+
+
+def test_memo_evicted_on_policy_change(tmp_path: pathlib.Path, processed: list[int]) -> None:
+    _load(tmp_path, 'Alice')
+
+    processed[0] = 0
+    changed = _load(tmp_path, 'Alice', weight=2)
+    # the other transaction on Expenses:Food overrides its ownership
+    assert processed[0] == 1
+
+    split_memo._MEMOS.clear()
+    (tmp_path / 'share.cache').unlink()
+    assert _load(tmp_path, 'Alice', weight=2) == changed
+
+
+def test_memo_evicted_on_precision_change(tmp_path: pathlib.Path, processed: list[int]) -> None:
+    _load(tmp_path, 'Alice')
+
+    processed[0] = 0
+    changed = _load(tmp_path, 'Alice', food='20.000')
+    assert processed[0] == 1
+    assert any('10.000 USD' in text for text in changed)
+
+    split_memo._MEMOS.clear()
+    (tmp_path / 'share.cache').unlink()
+    assert _load(tmp_path, 'Alice', food='20.000') == changed
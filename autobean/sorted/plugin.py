@@ -11,7 +11,7 @@ class OutOfOrderDirectiveError(error_lib.Error):
 def plugin(entries: list[Directive], options: dict[str, Any]) -> tuple[list[Directive], list[error_lib.Error]]:
     entries_by_file: defaultdict[str | None, list[Directive]] = defaultdict(list)
     ignored_files: set[str] = set()
-    errors: list[error_lib.Error] = []
+    error_logger = error_lib.ErrorLogger()
     for entry in entries:
         # Plugin-generated entries may not have associated file or line number.
         # We ignore entries in either case.
@@ -22,7 +22,7 @@ def plugin(entries: list[Directive], options: dict[str, Any]) -> tuple[list[Dire
             should_append = True
             if is_enabling_directive(entry):
                 if len(entry.values) != 1 or entry.values[0].dtype != bool:
-                    errors.append(error_lib.InvalidDirectiveError(
+                    error_logger.log_error(error_lib.InvalidDirectiveError(
                         entry.meta,
                         'autobean.sorted.enabled directive accepts a single '
                         'boolean argument',
@@ -35,15 +35,15 @@ def plugin(entries: list[Directive], options: dict[str, Any]) -> tuple[list[Dire
     entries_by_file.pop(None, None)
     for filename, file_entries in entries_by_file.items():
         if filename not in ignored_files:
-            errors.extend(check_file_entries(file_entries))
-    return entries, errors
+            check_file_entries(file_entries, error_logger)
+    return entries, error_logger.errors
     
 
 def is_enabling_directive(entry: Directive) -> bool:
     return isinstance(entry, Custom) and entry.type == 'autobean.sorted.enabled'
 
 
-def check_file_entries(entries: list[Directive]) -> list[error_lib.Error]:
+def check_file_entries(entries: list[Directive], error_logger: error_lib.ErrorLogger) -> None:
     """Checks entries are in order and finds out-of-order entries.
 
     We find a longest non-descending subsequence and assumes all other
@@ -95,12 +95,11 @@ def check_file_entries(entries: list[Directive]) -> list[error_lib.Error]:
             misplaced_entries.append(sorted_entries[k])
         i = j
 
-    errors: list[error_lib.Error] = []
     for misplaced_entry in misplaced_entries[::-1]:
-        errors.append(OutOfOrderDirectiveError(
+        error_logger.log_error_lazily(
+            OutOfOrderDirectiveError,
             misplaced_entry.meta,
             'Directive date does not follow non-descending order within the '
             'file',
-            misplaced_entry))
-    
-    return errors
+            (),
+            misplaced_entry)
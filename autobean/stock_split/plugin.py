@@ -1,52 +1,186 @@
+import collections
+import dataclasses
 import decimal
 from typing import Any, Iterable, Iterator, Optional
 from beancount.parser import options
 from beancount.core import account_types
 from beancount.core.data import Custom, Directive, Posting, Transaction
-from beancount.core.amount import mul
-from beancount.core import realization
-from autobean.utils import plugin_lib
+from beancount.core.amount import Amount
+from beancount.core.inventory import Inventory
+from beancount.core.position import Position
+from autobean.utils import error_lib, plugin_lib
+
+
+class _SplitMeta:
+    CONSOLIDATE = 'split_consolidate'
+    COST_PRECISION = 'split_cost_precision'
+    MAX_POSTINGS = 'split_max_postings'
+    ALL = frozenset([CONSOLIDATE, COST_PRECISION, MAX_POSTINGS])
 
 
 class Realizer:
-    def __init__(self, options_map: dict[str, Any]) -> None:
+    def __init__(self, options_map: dict[str, Any], commodities: Optional[set[str]] = None) -> None:
+        """Realizes balance sheet accounts, only on the given commodities if specified."""
         self._account_types = options.get_account_types(options_map)
-        self._real_root = realization.RealAccount('')
+        self._commodities = commodities
+        self._is_balance_sheet_account = dict[str, bool]()
+        # commodity -> account -> balance of that commodity
+        self._inventories = collections.defaultdict[str, dict[str, Inventory]](dict)
 
     def realize_transaction(self, transaction: Transaction) -> None:
         for posting in transaction.postings:
-            if not account_types.is_balance_sheet_account(posting.account, self._account_types):
+            if self._commodities is not None and posting.units.currency not in self._commodities:
+                continue
+            if (is_balance_sheet_account := self._is_balance_sheet_account.get(posting.account)) is None:
+                is_balance_sheet_account = self._is_balance_sheet_account[posting.account] = (
+                    account_types.is_balance_sheet_account(posting.account, self._account_types))
+            if not is_balance_sheet_account:
+                continue
+            inventories = self._inventories[posting.units.currency]
+            if (inventory := inventories.get(posting.account)) is None:
+                inventory = inventories[posting.account] = Inventory()
+            inventory.add_position(posting)
+
+    def get_split_postings(
+            self,
+            commodity: str,
+            multiplier: decimal.Decimal,
+            *,
+            consolidate: bool = False,
+            cost_precision: Optional[decimal.Decimal] = None,
+    ) -> Iterator[list[Posting]]:
+        """Generates postings splitting the given commodity in balanced groups.
+
+        If consolidate is True, lots with identical cost currency, date and label in the same account are merged into a
+        single lot at their average cost.
+        """
+        inventories = self._inventories.get(commodity, {})
+        # in the order of realization, i.e. by account components
+        for account in sorted(inventories, key=lambda account: account.split(':')):
+            positions = [position for position in inventories[account] if position.units.number]
+            if not consolidate:
+                for position in positions:
+                    yield _split_positions(account, [position], multiplier, cost_precision)
                 continue
-            real_account = realization.get_or_create(self._real_root, posting.account)
-            real_account.balance.add_position(posting)
-
-    def get_split_postings(self, commodity: str, multiplier: decimal.Decimal) -> Iterator[Posting]:
-        for real_account in realization.iter_children(self._real_root):
-            for position in real_account.balance:
-                if position.units.currency != commodity or not position.units.number:
-                    continue
-                new_cost = position.cost._replace(number=position.cost.number / multiplier)
-                yield Posting(
-                    account=real_account.account,
-                    units=-position.units,
-                    cost=position.cost,
-                    price=None,
-                    flag=None,
-                    meta=None)
-                yield Posting(
-                    account=real_account.account,
-                    units=mul(position.units, multiplier),
-                    cost=new_cost,
-                    price=None,
-                    flag=None,
-                    meta=None)
-
-
-@plugin_lib.plugin('autobean.stock_split')
+            groups = collections.defaultdict[Any, list[Position]](list)
+            for position in positions:
+                key = (
+                    position.cost.currency, position.cost.date, position.cost.label, position.units.number > 0
+                ) if position.cost else id(position)
+                groups[key].append(position)
+            for group in groups.values():
+                yield _split_positions(account, group, multiplier, cost_precision)
+
+
+def _split_positions(
+        account: str,
+        positions: list[Position],
+        multiplier: decimal.Decimal,
+        cost_precision: Optional[decimal.Decimal],
+) -> list[Posting]:
+    postings = [
+        Posting(
+            account=account,
+            units=-position.units,
+            cost=position.cost,
+            price=None,
+            flag=None,
+            meta=None)
+        for position in positions
+    ]
+    cost = positions[0].cost
+    currency = positions[0].units.currency
+    units = sum((position.units.number for position in positions), decimal.Decimal(0))
+    new_units = units * multiplier
+    if cost is None:
+        new_lots = [(new_units, None)]
+    else:
+        if len(positions) == 1:
+            new_cost_number = cost.number / multiplier
+        else:
+            new_cost_number = _get_total_cost(positions) / new_units
+        if cost_precision is not None:
+            new_cost_number = new_cost_number.quantize(cost_precision)
+        new_lots = [
+            (lot_units, cost._replace(number=lot_cost_number))
+            for lot_units, lot_cost_number in _get_balanced_lots(
+                new_units, new_cost_number, _get_total_cost(positions), cost_precision)
+        ]
+    for lot_units, lot_cost in new_lots:
+        postings.append(Posting(
+            account=account,
+            units=Amount(lot_units, currency),
+            cost=lot_cost,
+            price=None,
+            flag=None,
+            meta=None))
+    return postings
+
+
+def _get_total_cost(positions: list[Position]) -> decimal.Decimal:
+    return sum((position.units.number * position.cost.number for position in positions), decimal.Decimal(0))
+
+
+def _get_balanced_lots(
+        units: decimal.Decimal,
+        cost_number: decimal.Decimal,
+        total_cost: decimal.Decimal,
+        cost_precision: Optional[decimal.Decimal],
+) -> list[tuple[decimal.Decimal, decimal.Decimal]]:
+    """Returns (units, cost) of new lots whose total cost is exactly the given one.
+
+    If the cost is inexact (e.g. rounded), units are spread over two lots whose costs are one step apart. The step is
+    the cost precision, or the finest digit of the cost, but no coarser than the digits of total cost allow.
+    """
+    if units * cost_number == total_cost or not units:
+        return [(units, cost_number)]
+    cost_exponent = cost_number.as_tuple().exponent
+    total_exponent = total_cost.as_tuple().exponent
+    units_exponent = units.as_tuple().exponent
+    assert isinstance(cost_exponent, int) and isinstance(total_exponent, int) and isinstance(units_exponent, int)
+    step = cost_precision if cost_precision is not None else decimal.Decimal(1).scaleb(cost_exponent)
+    step = min(step, decimal.Decimal(1).scaleb(total_exponent - units_exponent))
+    with decimal.localcontext() as context:
+        # the quotient must not be rounded up before being floored
+        context.rounding = decimal.ROUND_FLOOR
+        low_cost_number = (total_cost / units).quantize(step)
+    high_cost_number = low_cost_number + step
+    # units at the higher cost making up for the rest
+    high_units = (total_cost - units * low_cost_number) / step
+    return [
+        (lot_units, lot_cost_number)
+        for lot_units, lot_cost_number in [(high_units, high_cost_number), (units - high_units, low_cost_number)]
+        if lot_units
+    ]
+
+
+@dataclasses.dataclass(frozen=True)
+class SplitOptions:
+    consolidate: bool = False
+    cost_precision: Optional[decimal.Decimal] = None
+    max_postings: Optional[int] = None
+
+    @classmethod
+    def from_meta(cls, meta: dict[str, Any]) -> 'SplitOptions':
+        consolidate = meta.get(_SplitMeta.CONSOLIDATE, False)
+        if not isinstance(consolidate, bool):
+            raise error_lib.PluginException(f'{_SplitMeta.CONSOLIDATE} must be a bool')
+        cost_precision = meta.get(_SplitMeta.COST_PRECISION)
+        if cost_precision is not None and (not isinstance(cost_precision, decimal.Decimal) or cost_precision <= 0):
+            raise error_lib.PluginException(f'{_SplitMeta.COST_PRECISION} must be a positive number')
+        max_postings = meta.get(_SplitMeta.MAX_POSTINGS)
+        if max_postings is not None:
+            if not isinstance(max_postings, decimal.Decimal) or max_postings != int(max_postings) or max_postings < 2:
+                raise error_lib.PluginException(f'{_SplitMeta.MAX_POSTINGS} must be an integer no less than 2')
+            max_postings = int(max_postings)
+        return cls(consolidate=consolidate, cost_precision=cost_precision, max_postings=max_postings)
+
+
+@plugin_lib.plugin('autobean.stock_split', barrier=True, preserves_order=True)
 class Plugin(plugin_lib.BasePlugin):
 
     def process(self, entries: list[Directive], options: dict[str, Any], arg: Optional[str]) -> Iterable[Directive]:
-        self._realizer = Realizer(options)
+        self._realizer = Realizer(options, get_split_commodities(entries))
         return super().process(entries, options, arg)
 
     @plugin_lib.handle_custom('autobean.stock_split', 'exactly one multiplier and one commodity')
@@ -56,7 +190,29 @@ class Plugin(plugin_lib.BasePlugin):
             multiplier: decimal.Decimal,
             commodity: plugin_lib.Currency,
     ) -> Iterator[Transaction]:
-        postings = self._realizer.get_split_postings(commodity, multiplier)
+        split_options = SplitOptions.from_meta(entry.meta)
+        meta = {key: value for key, value in entry.meta.items() if key not in _SplitMeta.ALL}
+        posting_groups = self._realizer.get_split_postings(
+            commodity,
+            multiplier,
+            consolidate=split_options.consolidate,
+            cost_precision=split_options.cost_precision)
+        postings: list[Posting] = []
+        for group in posting_groups:
+            if split_options.max_postings and postings and len(postings) + len(group) > split_options.max_postings:
+                yield self._realize_split(entry, meta, commodity, multiplier, postings)
+                postings = []
+            postings += group
+        yield self._realize_split(entry, meta, commodity, multiplier, postings)
+
+    def _realize_split(
+            self,
+            entry: Custom,
+            meta: dict[str, Any],
+            commodity: str,
+            multiplier: decimal.Decimal,
+            postings: list[Posting],
+    ) -> Transaction:
         txn = Transaction(
             date=entry.date,
             flag='*',
@@ -64,13 +220,23 @@ class Plugin(plugin_lib.BasePlugin):
             narration=f'{commodity} split {multiplier}:1',
             tags=set(),
             links=set(),
-            postings=list(postings),
-            meta=entry.meta,
+            postings=postings,
+            meta=dict(meta),
         )
         self._realizer.realize_transaction(txn)
-        yield txn
+        return txn
 
     @plugin_lib.handle(Transaction)
     def handle_txn(self, txn: Transaction) -> Iterator[Transaction]:
         self._realizer.realize_transaction(txn)
         yield txn
+
+
+def get_split_commodities(entries: Iterable[Directive]) -> set[str]:
+    commodities = set()
+    for entry in entries:
+        if isinstance(entry, Custom) and entry.type == 'autobean.stock_split':
+            for value in entry.values or ():
+                if value.dtype is Amount:
+                    commodities.add(value.value.currency)
+    return commodities
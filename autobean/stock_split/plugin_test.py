@@ -5,10 +5,10 @@ import textwrap
 from typing import Any
 from beancount.parser import printer
 from beancount.core.data import Directive, Transaction
-from beancount.ops import balance
-from beancount.parser import booking, parser
+from beancount import loader
+from beancount.parser import parser
 import pytest
-from .plugin import Plugin
+from .plugin import get_split_commodities
 
 
 _FOO_TEXT = textwrap.dedent('''
@@ -58,16 +58,9 @@ _FOO_TEXT = textwrap.dedent('''
 
 
 def load(text: str) -> tuple[list[Directive], list[Any]]:
-    entries, parsing_errors, options_map = parser.parse_string(text)
-    entries, booking_errors = booking.book(entries, options_map)
-    entries, plugin_errors = Plugin.plugin(entries, options_map)
-    entries, balance_errors = balance.check(entries, options_map)
-    return entries, [
-        *parsing_errors,
-        *booking_errors,
-        *plugin_errors,
-        *balance_errors,
-    ]
+    # a full run so that generated transactions are validated too
+    entries, errors, _ = loader.load_string('plugin "autobean.stock_split"\n' + text)
+    return entries, errors
 
 
 def test_ok() -> None:
@@ -125,3 +118,117 @@ def test_ok() -> None:
 def test_invalid(text: str) -> None:
     _, errors = load(text)
     assert errors
+
+
+def test_get_split_commodities() -> None:
+    entries, _, _ = parser.parse_string(_FOO_TEXT)
+    assert get_split_commodities(entries) == {'STOCK', 'STOCK.B'}
+
+
+_DRIP_TEXT = textwrap.dedent('''
+    2000-01-01 open Assets:Foo
+    2000-01-01 open Income:Foo
+    2000-02-01 *
+        Income:Foo
+        Assets:Foo   1 STOCK {1 USD}
+        Assets:Foo   1 STOCK {2 USD}
+        Assets:Foo   1 STOCK {4 USD}
+
+    2000-03-01 *
+        Income:Foo
+        Assets:Foo   1 STOCK {3 USD}
+
+    2000-05-01 custom "autobean.stock_split" 3 STOCK
+        split_consolidate: TRUE
+        split_cost_precision: 0.01
+        split_max_postings: 4
+
+    2000-05-02 balance Assets:Foo 12 STOCK
+''')
+
+
+def test_consolidate() -> None:
+    entries, errors = load(_DRIP_TEXT)
+    assert not errors
+    txns = [
+        entry for entry in entries
+        if isinstance(entry, Transaction) and entry.date == datetime.date(2000, 5, 1)]
+    texts = []
+    for txn in txns:
+        assert txn.narration == 'STOCK split 3:1'
+        assert not txn.meta.keys() & {'split_consolidate', 'split_cost_precision', 'split_max_postings'}
+        f = io.StringIO()
+        printer.print_entry(txn, file=f)
+        texts.append('\n'.join(sorted(filter(None, re.sub(r' +', ' ', f.getvalue()).split('\n')[1:]))))
+    assert texts == [
+        '''\
+ Assets:Foo -1 STOCK {1 USD, 2000-02-01}
+ Assets:Foo -1 STOCK {2 USD, 2000-02-01}
+ Assets:Foo -1 STOCK {4 USD, 2000-02-01}
+ Assets:Foo 2 STOCK {0.77 USD, 2000-02-01}
+ Assets:Foo 7 STOCK {0.78 USD, 2000-02-01}''',
+        '''\
+ Assets:Foo -1 STOCK {3 USD, 2000-03-01}
+ Assets:Foo 3 STOCK {1.00 USD, 2000-03-01}''',
+    ]
+
+
+@pytest.mark.parametrize('key,value', [
+    ('split_consolidate', '1'),
+    ('split_cost_precision', '-1'),
+    ('split_max_postings', '1'),
+    ('split_max_postings', '2.5'),
+])
+def test_invalid_options(key: str, value: str) -> None:
+    _, errors = load(re.sub(rf'{key}: .*', f'{key}: {value}', _DRIP_TEXT))
+    assert errors
+
+
+@pytest.mark.parametrize('precision,expected', [
+    ('', '''\
+ Assets:Foo -100 STOCK {5 USD, 2000-02-01}
+ Assets:Foo 100 STOCK {1.666666666666666666666666666 USD, 2000-02-01}
+ Assets:Foo 200 STOCK {1.666666666666666666666666667 USD, 2000-02-01}'''),
+    ('split_cost_precision: 0.0001', '''\
+ Assets:Foo -100 STOCK {5 USD, 2000-02-01}
+ Assets:Foo 100 STOCK {1.6666 USD, 2000-02-01}
+ Assets:Foo 200 STOCK {1.6667 USD, 2000-02-01}'''),
+])
+def test_inexact_cost(precision: str, expected: str) -> None:
+    entries, errors = load(textwrap.dedent(f'''
+        2000-01-01 open Assets:Foo
+        2000-01-01 open Income:Foo
+        2000-02-01 *
+            Income:Foo
+            Assets:Foo   100 STOCK {{5 USD}}
+        2000-05-01 custom "autobean.stock_split" 3 STOCK
+            {precision}
+        2000-05-02 balance Assets:Foo 300 STOCK
+    '''))
+    assert not errors
+    txn = entries[-2]
+    assert isinstance(txn, Transaction)
+    f = io.StringIO()
+    printer.print_entry(txn, file=f)
+    text = '\n'.join(sorted(filter(None, re.sub(r' +', ' ', f.getvalue()).split('\n')[1:])))
+    assert text == expected
+
+
+def test_account_order() -> None:
+    entries, errors = load(textwrap.dedent('''
+        2000-01-01 open Assets:Foo-X
+        2000-01-01 open Assets:Foo:Bar
+        2000-01-01 open Income:Foo
+        2000-02-01 *
+            Income:Foo
+            Assets:Foo-X     1 STOCK {1 USD}
+            Assets:Foo:Bar   1 STOCK {1 USD}
+        2000-05-01 custom "autobean.stock_split" 2 STOCK
+            split_max_postings: 2
+    '''))
+    assert not errors
+    txns = [
+        entry for entry in entries
+        if isinstance(entry, Transaction) and entry.date == datetime.date(2000, 5, 1)]
+    # as in realization, where Assets:Foo:Bar is under Assets:Foo
+    assert [txn.postings[0].account for txn in txns] == ['Assets:Foo:Bar', 'Assets:Foo-X']
@@ -1,25 +1,22 @@
 import datetime
 from decimal import Decimal
-import http.server
 import logging
 import os
 import re
 import time
 import secrets
 import sys
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 import urllib.parse
-import webbrowser
 
 from autobean.utils import deduplicate
 from beancount.core.amount import Amount
 from beancount.core.data import Transaction, Posting, Balance, Directive, new_metadata
 from beancount.core import inventory
 from beancount.ingest import importer
-from beancount.ingest import cache
-import dateutil.parser
-import requests
-import yaml
+
+if TYPE_CHECKING:
+    from beancount.ingest import cache
 
 
 CONFIG_SUFFIX = '.truelayer.yaml'
@@ -36,6 +33,11 @@ def format_iso_datetime(timestamp_s: float) -> str:
     return datetime.datetime.utcfromtimestamp(int(timestamp_s)).isoformat()
 
 
+def _parse_datetime(s: str) -> datetime.datetime:
+    import dateutil.parser
+    return dateutil.parser.parse(s)
+
+
 def currency_to_decimal(currency: float) -> Decimal:
     return Decimal(f'{currency:.2f}')
 
@@ -49,17 +51,18 @@ class Importer(importer.ImporterProtocol):
     def name(self) -> str:
         return 'autobean.truelayer'
 
-    def identify(self, file: cache._FileMemo) -> bool:
+    def identify(self, file: 'cache._FileMemo') -> bool:
         return file.name.endswith(CONFIG_SUFFIX)
 
-    def extract(self, file: cache._FileMemo, existing_entries: Optional[list[Directive]] = None) -> list[Directive]:
+    def extract(self, file: 'cache._FileMemo', existing_entries: Optional[list[Directive]] = None) -> list[Directive]:
         config = _Config(self._client_id, self._client_secret, file)
         extractor = _Extractor(config)
         return extractor.extract(existing_entries)
 
 
 class _Config:
-    def __init__(self, client_id: str, client_secret: str, file: cache._FileMemo):
+    def __init__(self, client_id: str, client_secret: str, file: 'cache._FileMemo'):
+        import yaml
         self.client_id = client_id
         self.client_secret = client_secret
         self.data = yaml.safe_load(file.contents()) or {}
@@ -70,6 +73,7 @@ class _Config:
         return os.path.basename(self._filename).rsplit(CONFIG_SUFFIX, 1)[0]
 
     def dump(self) -> None:
+        import yaml
         with open(self._filename, 'w') as f:
             yaml.safe_dump(self.data, f)
 
@@ -98,6 +102,7 @@ class _Extractor:
             'accounts': 'https://api.truelayer.com/data/v1/accounts',
             'cards': 'https://api.truelayer.com/data/v1/cards',
         }
+        import requests
         r = requests.get(url[type_], headers=self._auth_headers)
         if not r.ok:
             logging.warning('Could not fetch %s: %s', type_, r.text)
@@ -141,6 +146,7 @@ class _Extractor:
         logging.info(
             f'Fetching {log_transaction} for account {account["name"]} '
             f'({account_id}).')
+        import requests
         r = requests.get(
             url[(type_, is_pending)],
             headers=self._auth_headers,
@@ -169,6 +175,7 @@ class _Extractor:
         }
         logging.info(
             f'Fetching balance for account {account["name"]} ({account_id}).')
+        import requests
         r = requests.get(url[type_], headers=self._auth_headers)
         if not r.ok:
             logging.error('Error fetching balance: %s', r.text)
@@ -193,7 +200,7 @@ class _Extractor:
                     account_id, account, type_, False)
                 time_txns = [
                     (
-                        dateutil.parser.parse(truelayer_txn['timestamp']),
+                        _parse_datetime(truelayer_txn['timestamp']),
                         self._transform_transaction(
                             truelayer_txn, account['beancount_account']))
                     for truelayer_txn in truelayer_txns
@@ -202,7 +209,7 @@ class _Extractor:
                     account_id, account, type_, True)
                 pending_time_txns = [
                     (
-                        dateutil.parser.parse(truelayer_txn['timestamp']),
+                        _parse_datetime(truelayer_txn['timestamp']),
                         self._transform_transaction(
                             truelayer_txn, account['beancount_account'], True))
                     for truelayer_txn in pending_truelayer_txns
@@ -234,7 +241,7 @@ class _Extractor:
         available balance assertions may have to be corrected retrospectively.
         """
 
-        balance_time = dateutil.parser.parse(
+        balance_time = _parse_datetime(
             truelayer_balance['update_timestamp']).astimezone()
         assertion_time = datetime.datetime.combine(
             balance_time, datetime.time.min, balance_time.tzinfo)
@@ -305,7 +312,7 @@ class _Extractor:
             truelayer_txn['meta'].get('provider_merchant_name', None))
         return Transaction(
             meta=new_metadata('', 0),
-            date=dateutil.parser.parse(truelayer_txn['timestamp']).astimezone().date(),
+            date=_parse_datetime(truelayer_txn['timestamp']).astimezone().date(),
             flag='!' if is_pending else '*',
             payee=payee,
             narration=truelayer_txn['description'],
@@ -384,6 +391,7 @@ class _OAuthManager:
             req['refresh_token'] = refresh_token
         else:
             assert False
+        import requests
         r = requests.post('https://auth.truelayer.com/connect/token', req)
         if r.status_code != 200:
             logging.warning(
@@ -400,6 +408,8 @@ class _OAuthManager:
 
     def _request_code(self) -> str:
         """Get the code to redeem access token with regular OAuth flow."""
+        import http.server
+        import webbrowser
 
         state = secrets.token_urlsafe(16)
         code = None
@@ -1,7 +1,15 @@
+import itertools
 from collections import Counter
+from typing import Iterable, Iterator, NamedTuple
 from beancount.core import data
 from beancount.core.data import Directive
-from beancount.core.compare import hash_entry
+from autobean.utils.fingerprint import fingerprint
+
+
+class Difference(NamedTuple):
+    entry: Directive
+    # whether the entry is only in the first list, otherwise only in the second
+    in_first: bool
 
 
 def compare_entries(entries1: list[Directive], entries2: list[Directive]) -> tuple[bool, list[Directive], list[Directive]]:
@@ -9,15 +17,54 @@ def compare_entries(entries1: list[Directive], entries2: list[Directive]) -> tup
 
     Similiar to beancount.core.comparer.compare_entries but allows duplicated entries
     """
-    hashes1 = {
-        hash_entry(entry, exclude_meta=True): entry for entry in entries1}
-    hashes2 = {
-        hash_entry(entry, exclude_meta=True): entry for entry in entries2}
-
-    keys1 = Counter(hash_entry(entry, exclude_meta=True) for entry in entries1)
-    keys2 = Counter(hash_entry(entry, exclude_meta=True) for entry in entries2)
-
-    same = keys1 == keys2
-    missing1 = data.sorted([hashes1[key] for key in keys1 - keys2])
-    missing2 = data.sorted([hashes2[key] for key in keys2 - keys1])
-    return same, missing1, missing2
+    fingerprints1 = [fingerprint(entry) for entry in entries1]
+    fingerprints2 = [fingerprint(entry) for entry in entries2]
+    keys1 = Counter(fingerprints1)
+    keys2 = Counter(fingerprints2)
+    if keys1 == keys2:
+        return True, [], []
+
+    entries_by_key1 = dict(zip(fingerprints1, entries1))
+    entries_by_key2 = dict(zip(fingerprints2, entries2))
+    missing1 = data.sorted([entries_by_key1[key] for key in keys1 - keys2])
+    missing2 = data.sorted([entries_by_key2[key] for key in keys2 - keys1])
+    return False, missing1, missing2
+
+
+def diff_entries(entries1: Iterable[Directive], entries2: Iterable[Directive]) -> Iterator[Difference]:
+    """Yields entries only in one of two streams of entries, in date order.
+
+    Both streams must be sorted by date. Only entries of one date are held in memory at a time.
+    """
+    groups1 = itertools.groupby(entries1, key=lambda entry: entry.date)
+    groups2 = itertools.groupby(entries2, key=lambda entry: entry.date)
+    group1 = next(groups1, None)
+    group2 = next(groups2, None)
+    while group1 is not None or group2 is not None:
+        if group2 is None or (group1 is not None and group1[0] < group2[0]):
+            assert group1 is not None
+            yield from (Difference(entry, True) for entry in group1[1])
+            group1 = next(groups1, None)
+        elif group1 is None or group2[0] < group1[0]:
+            yield from (Difference(entry, False) for entry in group2[1])
+            group2 = next(groups2, None)
+        else:
+            yield from _diff_day_entries(list(group1[1]), list(group2[1]))
+            group1 = next(groups1, None)
+            group2 = next(groups2, None)
+
+
+def _diff_day_entries(entries1: list[Directive], entries2: list[Directive]) -> Iterator[Difference]:
+    fingerprints1 = [fingerprint(entry) for entry in entries1]
+    fingerprints2 = [fingerprint(entry) for entry in entries2]
+    unmatched = Counter(fingerprints2)
+    unmatched.subtract(fingerprints1)
+    # negative counts are extra entries in the first list and positive counts in the second
+    for entry, key in zip(entries1, fingerprints1):
+        if unmatched[key] < 0:
+            unmatched[key] += 1
+            yield Difference(entry, True)
+    for entry, key in zip(entries2, fingerprints2):
+        if unmatched[key] > 0:
+            unmatched[key] -= 1
+            yield Difference(entry, False)
@@ -0,0 +1,122 @@
+import textwrap
+from beancount.core.compare import hash_entry
+from beancount.core.data import Directive
+from beancount.parser import parser
+from . import compare
+from .fingerprint import fingerprint
+
+
+def _parse(text: str, filename: str = 'foo.bean') -> list[Directive]:
+    entries, errors, _ = parser.parse_string(textwrap.dedent(text), filename)
+    assert not errors
+    return entries
+
+
+def test_fingerprint() -> None:
+    entries1 = _parse('''
+        2000-01-01 open Assets:Foo USD,GBP
+        2000-01-02 * "foo" #tag1 #tag2
+            key: "value"
+            Assets:Foo    1.00 USD
+            Assets:Bar   -1.00 USD
+        2000-01-03 custom "foo" Assets:Foo 1.00 USD
+    ''')
+    entries2 = _parse('''
+
+        2000-01-01 open Assets:Foo USD,GBP
+        2000-01-02 * "foo" #tag2 #tag1
+            Assets:Bar   -1.00 USD
+            Assets:Foo    1.00 USD
+              key: "value"
+        2000-01-03 custom "foo" Assets:Foo 1.00 USD
+    ''', 'bar.bean')
+    assert [fingerprint(entry) for entry in entries1] == [fingerprint(entry) for entry in entries2]
+    hash(fingerprint(entries1[1]))
+
+
+def test_fingerprint_duplicated_postings() -> None:
+    entries = _parse('''
+        2000-01-02 *
+            Assets:Foo    1.00 USD
+            Assets:Foo    1.00 USD
+            Assets:Bar   -2.00 USD
+        2000-01-02 *
+            Assets:Foo    1.00 USD
+            Assets:Bar   -2.00 USD
+            Assets:Bar   -2.00 USD
+    ''')
+    assert fingerprint(entries[0]) != fingerprint(entries[1])
+
+
+def test_compare_entries() -> None:
+    entries1 = _parse('''
+        2000-01-01 open Assets:Foo
+        2000-01-01 open Assets:Foo
+        2000-01-02 open Assets:Bar
+    ''')
+    entries2 = _parse('''
+        2000-01-01 open Assets:Foo
+        2000-01-03 open Assets:Baz
+    ''')
+    same, missing1, missing2 = compare.compare_entries(entries1, entries2)
+    assert not same
+    assert missing1 == [entries1[1], entries1[2]]
+    assert missing2 == [entries2[1]]
+    assert compare.compare_entries(entries1, entries1[::-1]) == (True, [], [])
+
+
+def test_diff_entries() -> None:
+    entries1 = _parse('''
+        2000-01-01 open Assets:Foo
+        2000-01-01 open Assets:Foo
+        2000-01-02 open Assets:Bar
+        2000-01-04 open Assets:Qux
+    ''')
+    entries2 = _parse('''
+        2000-01-01 open Assets:Foo
+        2000-01-03 open Assets:Baz
+        2000-01-04 open Assets:Qux
+        2000-01-05 open Assets:Quux
+    ''')
+    assert list(compare.diff_entries(iter(entries1), iter(entries2))) == [
+        compare.Difference(entries1[0], True),
+        compare.Difference(entries1[2], True),
+        compare.Difference(entries2[1], False),
+        compare.Difference(entries2[3], False),
+    ]
+
+
+def test_fingerprint_unordered_values() -> None:
+    entries = _parse('''
+        2000-01-01 open Assets:Foo USD,GBP
+        2000-01-01 open Assets:Foo GBP,USD
+        2000-01-02 custom "foo" Assets:Foo 1.00 USD
+        2000-01-02 custom "foo" 1.00 USD Assets:Foo
+        2000-01-02 custom "foo" 1.00 USD Assets:Foo Assets:Foo
+    ''')
+    # same as hash_entry
+    assert fingerprint(entries[0]) == fingerprint(entries[1])
+    assert hash_entry(entries[0], exclude_meta=True) == hash_entry(entries[1], exclude_meta=True)
+    assert fingerprint(entries[2]) == fingerprint(entries[3])
+    assert hash_entry(entries[2], exclude_meta=True) == hash_entry(entries[3], exclude_meta=True)
+    assert fingerprint(entries[3]) != fingerprint(entries[4])
+    assert hash_entry(entries[3], exclude_meta=True) != hash_entry(entries[4], exclude_meta=True)
+
+
+def test_fingerprint_precision() -> None:
+    entries = _parse('''
+        2000-01-02 *
+            Assets:Foo    1 USD
+            Assets:Bar   -1 USD
+        2000-01-02 *
+            Assets:Foo    1.00 USD
+            Assets:Bar   -1 USD
+        2000-01-03 balance Assets:Foo  1 USD
+        2000-01-03 balance Assets:Foo  1.00 USD
+        2000-01-04 custom "foo" 1 USD
+        2000-01-04 custom "foo" 1.00 USD
+    ''')
+    # same as hash_entry
+    for i in range(0, len(entries), 2):
+        assert fingerprint(entries[i]) != fingerprint(entries[i + 1])
+        assert hash_entry(entries[i], exclude_meta=True) != hash_entry(entries[i + 1], exclude_meta=True)
@@ -4,7 +4,6 @@ import datetime
 from typing import Iterable
 
 from beancount.core.data import Transaction, Directive, iter_entry_dates, filter_txns
-from beancount.ingest.extract import DUPLICATE_META
 
 
 _Node = tuple[bool, Directive]  # (is_new_entry, entry)
@@ -99,6 +98,8 @@ def deduplicate(
         if id(new_entry) in duplicates:
             continue
         elif id(new_entry) in possibly_duplicates and hasattr(new_entry, 'meta'):
+            # beancount.ingest is slow to import
+            from beancount.ingest.extract import DUPLICATE_META
             meta = copy.deepcopy(new_entry.meta)
             meta[DUPLICATE_META] = True
             ret.append(new_entry._replace(meta=meta))
@@ -1,4 +1,5 @@
-from typing import Any, Iterable, NamedTuple, Optional
+import collections
+from typing import Any, Iterable, NamedTuple, Optional, Type
 from beancount.loader import LoadError
 from beancount.core.data import Directive, Meta
 
@@ -23,17 +24,61 @@ class PluginException(Exception):
         self.meta = meta
 
 
+class _LazyError(NamedTuple):
+    error_type: Type[Error]
+    source: Meta
+    template: str
+    args: tuple[Any, ...]
+    entry: Directive | list[Directive] | None
+
+    def format(self) -> Error:
+        return self.error_type(self.source, self.template.format(*self.args), self.entry)
+
+
 class ErrorLogger:
-    errors: list[Error]
+    """Collects errors, formatting their messages only when read.
 
-    def __init__(self) -> None:
-        self.errors = []
+    Errors are categorized by their types. If `max_errors_per_category` is set, errors of a category beyond it are
+    dropped and summarized into a single error of that category.
+    """
+
+    def __init__(self, max_errors_per_category: Optional[int] = None) -> None:
+        self._max_errors_per_category = max_errors_per_category
+        self._records: list[Error | _LazyError] = []
+        self._counts = collections.Counter[Type[Error]]()
+        self._omitted_counts = collections.Counter[Type[Error]]()
+        # the source of the first omitted error of each category
+        self._omitted_sources: dict[Type[Error], Meta] = {}
+        self._errors: Optional[list[Error]] = None
+
+    @property
+    def errors(self) -> list[Error]:
+        if self._errors is None:
+            self._errors = [
+                record.format() if isinstance(record, _LazyError) else record
+                for record in self._records
+            ]
+            for error_type, source in self._omitted_sources.items():
+                self._errors.append(error_type(
+                    source, f'{self._omitted_counts[error_type]} more errors of this kind were omitted', None))
+        return self._errors
 
     def log_error(self, error: Error) -> None:
-        self.errors.append(error)
+        self._log(type(error), error)
 
     def log_errors(self, errors: Iterable[Error]) -> None:
-        self.errors.extend(errors)
+        for error in errors:
+            self._log(type(error), error)
+
+    def log_error_lazily(
+            self,
+            error_type: Type[Error],
+            source: Meta,
+            template: str,
+            args: tuple[Any, ...],
+            entry: Directive | list[Directive] | None) -> None:
+        """Logs an error whose message is `template.format(*args)`, formatted only when read."""
+        self._log(error_type, _LazyError(error_type, source, template, args, entry))
 
     def log_loading_errors(self, errors: Iterable[Error], entry: Directive) -> None:
         for error in errors:
@@ -42,4 +87,13 @@ class ErrorLogger:
                     source=entry.meta,
                     entry=entry,
                 )
-            self.errors.append(error)
+            self._log(type(error), error)
+
+    def _log(self, error_type: Type[Error], record: Error | _LazyError) -> None:
+        self._errors = None
+        self._counts[error_type] += 1
+        if self._max_errors_per_category is not None and self._counts[error_type] > self._max_errors_per_category:
+            self._omitted_counts[error_type] += 1
+            self._omitted_sources.setdefault(error_type, record.source)
+            return
+        self._records.append(record)
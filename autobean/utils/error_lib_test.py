@@ -0,0 +1,46 @@
+from beancount.core.data import new_metadata
+from . import error_lib
+
+
+class _Repr:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __repr__(self) -> str:
+        self.calls += 1
+        return 'repr'
+
+
+def test_lazy_formatting() -> None:
+    logger = error_lib.ErrorLogger()
+    arg = _Repr()
+    logger.log_error_lazily(error_lib.PluginError, new_metadata('foo', 1), 'error: {!r}', (arg,), None)
+    assert arg.calls == 0
+
+    errors = logger.errors
+    assert arg.calls == 1
+    assert errors == [error_lib.PluginError(new_metadata('foo', 1), 'error: repr', None)]
+    assert isinstance(errors[0], error_lib.PluginError)
+    assert logger.errors is errors
+
+
+def test_max_errors_per_category() -> None:
+    logger = error_lib.ErrorLogger(max_errors_per_category=2)
+    for i in range(5):
+        logger.log_error_lazily(error_lib.PluginError, new_metadata('foo', i), 'error {}', (i,), None)
+    logger.log_error(error_lib.InvalidDirectiveError(new_metadata('foo', 10), 'invalid', None))
+
+    assert [(type(error), error.source['lineno'], error.message) for error in logger.errors] == [
+        (error_lib.PluginError, 0, 'error 0'),
+        (error_lib.PluginError, 1, 'error 1'),
+        (error_lib.InvalidDirectiveError, 10, 'invalid'),
+        (error_lib.PluginError, 2, '3 more errors of this kind were omitted'),
+    ]
+
+
+def test_unlimited() -> None:
+    logger = error_lib.ErrorLogger()
+    logger.log_errors(
+        error_lib.PluginError(new_metadata('foo', i), 'error', None)
+        for i in range(10000))
+    assert len(logger.errors) == 10000
@@ -0,0 +1,102 @@
+"""Structural fingerprints of directives.
+
+A fingerprint is a hashable value identifying a directive regardless of its metadata, similar to
+`beancount.core.compare.hash_entry(entry, exclude_meta=True)` but much cheaper to compute. As in `hash_entry`, lists
+and sets (e.g. postings, tags, links, `Open.currencies` and `Custom.values`) are compared regardless of their order,
+with duplicates counted. Also as in `hash_entry`, numbers are compared along with their precision, e.g. `10 USD` and
+`10.00 USD` differ.
+"""
+
+import collections
+import decimal
+from typing import Any, Callable, Hashable, Type
+from beancount.core import data
+from beancount.core.amount import Amount
+from beancount.core.data import Directive, Posting, Transaction
+
+Fingerprint = Hashable
+_IGNORED_FIELDS = frozenset({'meta', 'diff_amount'})
+
+
+def fingerprint(entry: Directive) -> Fingerprint:
+    return _ENCODERS.get(type(entry), _encode_generic)(entry)
+
+
+def fingerprint_postings(postings: list[Posting]) -> Fingerprint:
+    """Fingerprint of postings in their order, unlike that of their transaction."""
+    return tuple(_encode_posting(posting) for posting in postings)
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, tuple):
+        # e.g. amounts, costs and custom values
+        return (type(value), *(_freeze(item) for item in value))
+    if isinstance(value, list):
+        return frozenset(collections.Counter(_freeze(item) for item in value).items())
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _encode_generic(entry: Any) -> Fingerprint:
+    return (type(entry), *(
+        _freeze(value)
+        for name, value in zip(entry._fields, entry)
+        if name not in _IGNORED_FIELDS))
+
+
+def _make_encoder(directive_type: Type[Directive]) -> Callable[[Any], Fingerprint]:
+    indices = [i for i, name in enumerate(directive_type._fields) if name not in _IGNORED_FIELDS]
+    # fields that may hold numbers, lists or sets, e.g. Balance.amount, Open.currencies or Custom.values
+    frozen_indices = frozenset(
+        i for i in indices
+        if directive_type._fields[i] in ('amount', 'tolerance', 'currencies', 'values', 'tags', 'links'))
+
+    def encode(entry: Any) -> Fingerprint:
+        return (directive_type, *(
+            _freeze(entry[i]) if i in frozen_indices else entry[i]
+            for i in indices))
+
+    return encode
+
+
+def _encode_amount(amount: Any) -> Hashable:
+    if isinstance(amount, Amount):
+        return (str(amount.number), amount.currency)
+    return _freeze(amount)
+
+
+def _encode_posting(posting: Posting) -> Fingerprint:
+    return (
+        posting.account,
+        _encode_amount(posting.units),
+        _freeze(posting.cost),
+        _encode_amount(posting.price),
+        posting.flag,
+    )
+
+
+def _encode_transaction(entry: Transaction) -> Fingerprint:
+    postings = tuple(_encode_posting(posting) for posting in entry.postings)
+    posting_set = frozenset(postings)
+    if len(posting_set) != len(postings):
+        # duplicated postings are counted
+        posting_set = frozenset(collections.Counter(postings).items())
+    return (
+        Transaction,
+        entry.date,
+        entry.flag,
+        entry.payee,
+        entry.narration,
+        frozenset(entry.tags or ()),
+        frozenset(entry.links or ()),
+        posting_set,
+    )
+
+
+_ENCODERS: dict[Type[Directive], Callable[[Any], Fingerprint]] = {
+    directive_type: _make_encoder(directive_type) for directive_type in data.ALL_DIRECTIVES
+}
+_ENCODERS[Transaction] = _encode_transaction
@@ -1,16 +1,16 @@
 import collections
-import contextlib
 import dataclasses
 import decimal
 import inspect
 import re
 import shlex
-from typing import Any, Callable, ClassVar, Generic, Iterable, Iterator, NewType, Optional, Type, TypeVar, Union, get_args, get_origin
+from typing import Any, Callable, ClassVar, Generic, Iterable, NewType, Optional, Type, TypeVar, Union, cast, get_args, get_origin
 from beancount.core.data import Custom, Directive
+from beancount.core import data
 from beancount.core.amount import Amount
 from beancount.core import account as beancount_account
 from beancount.parser import grammar
-from autobean.utils import error_lib
+from autobean.utils import error_lib, profile_lib
 
 Account = NewType('Account', str)
 Currency = NewType('Currency', str)
@@ -20,6 +20,11 @@ _R = TypeVar('_R', bound=Iterable[Directive])
 _Plugin = TypeVar('_Plugin', bound='BasePlugin')
 _RegularHandlerImpl = Callable[[_Plugin, _T], _R]
 _CustomHandlerImpl = Callable[..., _R]  # (self, custom, *args)
+# Pops the next argument from a reversed list of values. Returns None if mismatched.
+_ArgMatcher = Callable[[list[grammar.ValueType]], Optional[Any]]
+_ValueConverter = Callable[[grammar.ValueType, list[grammar.ValueType]], Optional[Any]]
+_Dispatcher = Callable[['BasePlugin', Any], Iterable[Directive]]
+_PluginFunc = Callable[..., tuple[list[Directive], list[error_lib.Error]]]  # (entries, options[, arg])
 
 
 @dataclasses.dataclass(frozen=True)
@@ -33,7 +38,8 @@ class _RegularHandler(Generic[_Plugin, _T, _R]):
 class _CustomHandler:
     custom_type: str
     params_description: str
-    params: list[inspect.Parameter]
+    arg_matchers: list[_ArgMatcher]
+    var_arg_matcher: Optional[_ArgMatcher]
     impl: _CustomHandlerImpl
 
 
@@ -41,13 +47,20 @@ class BasePlugin:
     _NAME: ClassVar[str]
     _ARGUMENT_TYPE: ClassVar[Any]
     _CUSTOM_SCOPE: ClassVar[Optional[re.Pattern]]
-    _REGULAR_HANDLERS: ClassVar[dict[int, _RegularHandler]]
+    # whether process needs the complete list of entries rather than a single pass over them
+    _BARRIER: ClassVar[bool]
+    # whether process keeps sorted entries sorted
+    _PRESERVES_ORDER: ClassVar[bool]
+    # errors of each category beyond this number are only counted, if set
+    _MAX_ERRORS_PER_CATEGORY: ClassVar[Optional[int]]
+    _REGULAR_HANDLERS: ClassVar[dict[Type[Directive], _RegularHandler]]
     _CUSTOM_HANDLERS: ClassVar[dict[str, list[_CustomHandler]]]
+    _DISPATCH_TABLE: ClassVar['_DispatchTable']
 
     _error_logger: error_lib.ErrorLogger
 
     def __init__(self) -> None:
-        self._error_logger = error_lib.ErrorLogger()
+        self._error_logger = error_lib.ErrorLogger(self._MAX_ERRORS_PER_CATEGORY)
 
     @classmethod
     def plugin(
@@ -56,12 +69,22 @@ class BasePlugin:
             options: dict[str, Any],
             arg: Optional[str] = None,
     ) -> tuple[list[Directive], list[error_lib.Error]]:
+        cls._check_argument(arg)
+        inst = cls()
+        return list(inst._run(entries, options, arg)), inst._error_logger.errors
+
+    def _run(self, entries: list[Directive], options: dict[str, Any], arg: Optional[str]) -> Iterable[Directive]:
+        if profile_lib.PROFILER.enabled:
+            return profile_lib.PROFILER.profile_iterable(
+                f'{self._NAME}:process', lambda: self.process(entries, options, arg))
+        return self.process(entries, options, arg)
+
+    @classmethod
+    def _check_argument(cls, arg: Optional[str]) -> None:
         if cls._ARGUMENT_TYPE is None and arg is not None:
             raise ValueError(f'{cls._NAME} does not accept an argument')
         elif cls._ARGUMENT_TYPE is not None and arg is None:
             raise ValueError(f'{cls._NAME} expects an argument')
-        inst = cls()
-        return list(inst.process(entries, options, arg)), inst._error_logger.errors
 
     def process(
             self,
@@ -73,44 +96,116 @@ class BasePlugin:
             return
         self._options = options
         self._argument = arg
+        if profile_lib.PROFILER.enabled:
+            regular_handlers, custom_handlers = _profile_handlers(
+                self._NAME, self._REGULAR_HANDLERS, self._CUSTOM_HANDLERS)
+            dispatch_table = _build_dispatch_table(regular_handlers, custom_handlers, self._CUSTOM_SCOPE)
+        else:
+            dispatch_table = self._DISPATCH_TABLE
+        error_logger = self._error_logger
         for entry in entries:
-            yield from self._process_entry(entry)
+            if (dispatcher := dispatch_table[type(entry)]) is None:
+                yield entry
+                continue
+            try:
+                yield from dispatcher(self, entry)
+            except error_lib.PluginException as e:
+                error_logger.log_error(error_lib.PluginError(
+                    e.meta or entry.meta, str(e), entry))
+
+
+class _DispatchTable(dict[Type[Directive], Optional[_Dispatcher]]):
+    """Dispatchers by concrete directive type. None means the directive is passed through."""
+
+    def __init__(self, dispatchers: dict[Type[Directive], _Dispatcher]):
+        super().__init__(dispatchers)
+        self._dispatchers = dispatchers
+
+    def __missing__(self, directive_type: Type[Directive]) -> Optional[_Dispatcher]:
+        # resolves each directive type not seen before once through its MRO
+        dispatcher = next(
+            (self._dispatchers[base] for base in directive_type.__mro__ if base in self._dispatchers),
+            None)
+        self[directive_type] = dispatcher
+        return dispatcher
+
+
+def _build_dispatch_table(
+        regular_handlers: dict[Type[Directive], _RegularHandler],
+        custom_handlers: dict[str, list[_CustomHandler]],
+        custom_scope: Optional[re.Pattern],
+) -> _DispatchTable:
+    dispatchers: dict[Type[Directive], _Dispatcher] = {
+        directive_type: _make_regular_dispatcher(handler)
+        for directive_type, handler in regular_handlers.items()
+    }
+    # custom handlers take precedence over regular handlers of Custom
+    if custom_handlers or custom_scope is not None:
+        dispatchers[Custom] = _make_custom_dispatcher(custom_handlers, custom_scope, dispatchers.get(Custom))
+    return _DispatchTable(dispatchers)
+
+
+def _make_regular_dispatcher(handler: _RegularHandler) -> _Dispatcher:
+    impl, when = handler.impl, handler.when
+    if when is None:
+        return impl
+
+    def dispatcher(plugin: BasePlugin, entry: Directive) -> Iterable[Directive]:
+        if not when(plugin):
+            return ()
+        return impl(plugin, entry)
+
+    return dispatcher
+
 
-    def _process_entry(self, entry: Directive) -> Iterator[Directive]:
-        if isinstance(entry, Custom) and (handlers := self._CUSTOM_HANDLERS.get(entry.type)):
+def _make_custom_dispatcher(
+        custom_handlers: dict[str, list[_CustomHandler]],
+        custom_scope: Optional[re.Pattern],
+        fallback: Optional[_Dispatcher],
+) -> _Dispatcher:
+
+    def dispatcher(plugin: BasePlugin, entry: Directive) -> Iterable[Directive]:
+        assert isinstance(entry, Custom)
+        if handlers := custom_handlers.get(entry.type):
             for chandler in handlers:
                 if (args := _get_args(entry.values or [], chandler)) is not None:
-                    with _wrap_plugin_exception(entry, self._error_logger):
-                        yield from chandler.impl(self, entry, *args)
-                    return
-            self._error_logger.log_error(
+                    return chandler.impl(plugin, entry, *args)
+            plugin._error_logger.log_error(
                 error_lib.InvalidDirectiveError(
                     entry.meta,
                     f'Invalid arguments: {shlex.quote(entry.type)} expects {chandler.params_description}.',
                     entry))
-            return
-        if rhandler := self._REGULAR_HANDLERS.get(id(type(entry))):
-            if rhandler.when is not None and not rhandler.when(self):
-                return
-            with _wrap_plugin_exception(entry, self._error_logger):
-                yield from rhandler.impl(self, entry)
-            return
-        yield entry
-        if isinstance(entry, Custom) and (
-                self._CUSTOM_SCOPE is not None and self._CUSTOM_SCOPE.match(entry.type)):
-            self._error_logger.log_error(
+            return ()
+        if fallback is not None:
+            return fallback(plugin, entry)
+        if custom_scope is not None and custom_scope.match(entry.type):
+            plugin._error_logger.log_error(
                 error_lib.InvalidDirectiveError(
                     entry.meta, f'Unrecognized custom directive {shlex.quote(entry.type)}.', entry))
-            return
+        return (entry,)
+
+    return dispatcher
 
 
-@contextlib.contextmanager
-def _wrap_plugin_exception(entry: Directive, error_logger: error_lib.ErrorLogger) -> Iterator[None]:
-    try:
-        yield
-    except error_lib.PluginException as e:
-        error_logger.log_error(error_lib.PluginError(
-            e.meta or entry.meta, str(e), entry))
+def _profile_handlers(
+        name: str,
+        regular_handlers: dict[Type[Directive], _RegularHandler],
+        custom_handlers: dict[str, list[_CustomHandler]],
+) -> tuple[dict[Type[Directive], _RegularHandler], dict[str, list[_CustomHandler]]]:
+    profiler = profile_lib.PROFILER
+    return (
+        {
+            key: dataclasses.replace(handler, impl=profiler.wrap(f'{name}:{handler.impl.__name__}', handler.impl))
+            for key, handler in regular_handlers.items()
+        },
+        {
+            key: [
+                dataclasses.replace(handler, impl=profiler.wrap(f'{name}:{handler.impl.__name__}', handler.impl))
+                for handler in handlers
+            ]
+            for key, handlers in custom_handlers.items()
+        },
+    )
 
 
 def _get_args(
@@ -119,44 +214,57 @@ def _get_args(
 ) -> Optional[list[Any]]:
     queue = values[::-1]
     args = []
-    for param in handler.params:
-        if param.kind in (
-                inspect.Parameter.POSITIONAL_OR_KEYWORD,
-                inspect.Parameter.POSITIONAL_ONLY):
-            if (arg := _get_arg(param.annotation, queue)) is not None:
-                args.append(arg)
-            else:
+    for arg_matcher in handler.arg_matchers:
+        if not queue or (arg := arg_matcher(queue)) is None:
+            return None
+        args.append(arg)
+    if (var_arg_matcher := handler.var_arg_matcher) is not None:
+        while queue:
+            if (arg := var_arg_matcher(queue)) is None:
                 return None
-        elif param.kind is inspect.Parameter.VAR_POSITIONAL:
-            while queue:
-                if (arg := _get_arg(param.annotation, queue)) is not None:
-                    args.append(arg)
-                else:
-                    return None
+            args.append(arg)
     if queue:
         return None
     return args
 
 
-def _get_arg(annotation: Any, queue: list[grammar.ValueType]) -> Optional[Any]:
-    if not queue:
-        return None
-    value = queue.pop()
+def _compile_arg_matcher(annotation: Any) -> _ArgMatcher:
     if get_origin(annotation) is Union:
         options = get_args(annotation)
     else:
         options = (annotation,)
+    converters = collections.defaultdict[Any, list[_ValueConverter]](list)
     for option in options:
-        if value.dtype is option:
-            return value.value
-        elif option is Account:
-            if value.dtype == beancount_account.TYPE:
-                return Account(value.value)
-        elif option is decimal.Decimal and value.dtype is Amount:
-            if value.value.number is not None:
-                queue.append(grammar.ValueType(Currency(value.value.currency), Currency))
-                return value.value.number
-    return None
+        converters[option].append(_convert_value)
+        if option is Account:
+            converters[beancount_account.TYPE].append(_convert_account)
+        elif option is decimal.Decimal:
+            converters[Amount].append(_convert_amount_number)
+    converters_by_dtype = {dtype: tuple(dtype_converters) for dtype, dtype_converters in converters.items()}
+
+    def arg_matcher(queue: list[grammar.ValueType]) -> Optional[Any]:
+        value = queue.pop()
+        for converter in converters_by_dtype.get(value.dtype, ()):
+            if (arg := converter(value, queue)) is not None:
+                return arg
+        return None
+
+    return arg_matcher
+
+
+def _convert_value(value: grammar.ValueType, queue: list[grammar.ValueType]) -> Optional[Any]:
+    return value.value
+
+
+def _convert_account(value: grammar.ValueType, queue: list[grammar.ValueType]) -> Optional[Any]:
+    return Account(value.value)
+
+
+def _convert_amount_number(value: grammar.ValueType, queue: list[grammar.ValueType]) -> Optional[Any]:
+    if value.value.number is None:
+        return None
+    queue.append(grammar.ValueType(Currency(value.value.currency), Currency))
+    return value.value.number
 
 
 def plugin(
@@ -164,21 +272,28 @@ def plugin(
         *,
         param_type: Any = None,
         custom_scope: Optional[str] = None,
+        barrier: bool = False,
+        preserves_order: bool = False,
+        max_errors_per_category: Optional[int] = None,
 ) -> Callable[[Type[_Plugin]], Type[_Plugin]]:
     def decorator(cls: Type[_Plugin]) -> Type[_Plugin]:
         cls._NAME = name
         cls._ARGUMENT_TYPE = param_type
         cls._CUSTOM_SCOPE = re.compile(custom_scope) if custom_scope is not None else None
+        cls._BARRIER = barrier
+        cls._PRESERVES_ORDER = preserves_order
+        cls._MAX_ERRORS_PER_CATEGORY = max_errors_per_category
         regular_handlers = {}
         custom_handlers = collections.defaultdict(list) 
         for _, func in inspect.getmembers(cls, predicate=inspect.isfunction):
             handler = getattr(func, _HANDLER_ATTR, None)
             if isinstance(handler, _RegularHandler):
-                regular_handlers[id(handler.directive_type)] = handler
+                regular_handlers[handler.directive_type] = handler
             elif isinstance(handler, _CustomHandler):
                 custom_handlers[handler.custom_type].append(handler)
         cls._REGULAR_HANDLERS = regular_handlers
         cls._CUSTOM_HANDLERS = custom_handlers
+        cls._DISPATCH_TABLE = _build_dispatch_table(regular_handlers, custom_handlers, cls._CUSTOM_SCOPE)
         return cls
     return decorator
 
@@ -196,10 +311,82 @@ def handle(
 
 def handle_custom(custom_type: str, params_description: str) -> Callable[[_CustomHandlerImpl], _CustomHandlerImpl]:
     def decorator(impl: _CustomHandlerImpl) -> _CustomHandlerImpl:
+        # signatures are compiled once here so that dispatching involves no introspection
+        arg_matchers = []
+        var_arg_matcher = None
+        for param in list(inspect.signature(impl).parameters.values())[2:]:
+            if param.kind in (
+                    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                    inspect.Parameter.POSITIONAL_ONLY):
+                arg_matchers.append(_compile_arg_matcher(param.annotation))
+            elif param.kind is inspect.Parameter.VAR_POSITIONAL:
+                var_arg_matcher = _compile_arg_matcher(param.annotation)
         setattr(impl, _HANDLER_ATTR, _CustomHandler(
             custom_type=custom_type,
             params_description=params_description,
-            params=list(inspect.signature(impl).parameters.values())[2:],
+            arg_matchers=arg_matchers,
+            var_arg_matcher=var_arg_matcher,
             impl=impl))
         return impl
     return decorator
+
+
+class Pipeline:
+    """Runs multiple plugins as a single beancount plugin.
+
+    Beancount sorts all entries after every plugin. A pipeline instead only sorts them again after a stage which may
+    have broken their order, i.e. a plain plugin function or a `BasePlugin` not declared with `preserves_order=True`.
+
+    Entries only stream through consecutive stages not declared with `barrier=True`, which among autobean plugins is
+    only `autobean.include`. Other stages, including all plain plugin functions such as `autobean.narration` and
+    `autobean.sorted`, still receive the complete list of entries. The saving is therefore mostly the skipped re-sorts.
+
+    Each stage is either a `BasePlugin` subclass or a plain plugin function, optionally paired with its argument.
+    Register a pipeline with:
+
+        __plugins__ = [Pipeline(StockSplitPlugin, (SharePlugin, 'Alice')).plugin]
+    """
+
+    def __init__(self, *stages: Union[Type[BasePlugin], _PluginFunc, tuple[Union[Type[BasePlugin], _PluginFunc], Optional[str]]]):
+        self._stages = [stage if isinstance(stage, tuple) else (stage, None) for stage in stages]
+        for stage, arg in self._stages:
+            if isinstance(stage, type) and issubclass(stage, BasePlugin):
+                stage._check_argument(arg)
+
+    def plugin(
+            self,
+            entries: list[Directive],
+            options: dict[str, Any],
+            config: Optional[str] = None,
+    ) -> tuple[list[Directive], list[error_lib.Error]]:
+        if config is not None:
+            raise ValueError('A pipeline does not accept an argument. Pair each stage with its own argument instead.')
+        # errors are reported in stage order once all entries have gone through
+        error_loggers = []
+        stream: Iterable[Directive] = entries
+        is_sorted = True
+        for stage, arg in self._stages:
+            if isinstance(stage, type) and issubclass(stage, BasePlugin):
+                if stage._BARRIER or not is_sorted:
+                    stream, is_sorted = _materialize(stream, is_sorted), True
+                inst = stage()
+                # non-barrier stages only iterate through entries once
+                stream = inst._run(stream, options, arg)  # type: ignore[arg-type]
+                is_sorted = is_sorted and stage._PRESERVES_ORDER
+                error_loggers.append(inst._error_logger)
+            else:
+                func = cast(_PluginFunc, stage)
+                stage_args = (options,) if arg is None else (options, arg)
+                stream, stage_errors = func(_materialize(stream, is_sorted), *stage_args)
+                is_sorted = False
+                error_logger = error_lib.ErrorLogger()
+                error_logger.log_errors(stage_errors)
+                error_loggers.append(error_logger)
+        ret = list(stream)
+        return ret, [error for error_logger in error_loggers for error in error_logger.errors]
+
+
+def _materialize(entries: Iterable[Directive], is_sorted: bool) -> list[Directive]:
+    if is_sorted:
+        return entries if isinstance(entries, list) else list(entries)
+    return data.sorted(entries)
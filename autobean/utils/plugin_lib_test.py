@@ -0,0 +1,195 @@
+import datetime
+import decimal
+import json
+import pathlib
+import textwrap
+from typing import Any, Iterator, Optional
+from beancount.core.data import Custom, Directive
+from beancount.core.amount import Amount
+from beancount.parser import parser
+import pytest
+from . import error_lib, plugin_lib, profile_lib
+
+
+@plugin_lib.plugin('test')
+class _Plugin(plugin_lib.BasePlugin):
+
+    @plugin_lib.handle_custom('test.account', 'an account or a string')
+    def handle_account(self, entry: Custom, account: plugin_lib.Account | str) -> Iterator[Directive]:
+        yield entry._replace(values=[account])
+
+    @plugin_lib.handle_custom('test.number', 'a number and a currency')
+    def handle_number(
+            self,
+            entry: Custom,
+            number: decimal.Decimal,
+            currency: plugin_lib.Currency,
+    ) -> Iterator[Directive]:
+        yield entry._replace(values=[number, currency])
+
+    @plugin_lib.handle_custom('test.amount', 'an amount and an optional tolerance')
+    def handle_amount(self, entry: Custom, amount: Amount) -> Iterator[Directive]:
+        yield entry._replace(values=[amount])
+
+    @plugin_lib.handle_custom('test.amount', 'an amount and an optional tolerance')
+    def handle_amount_tolerance(self, entry: Custom, amount: Amount, tolerance: Optional[decimal.Decimal]) -> Iterator[Directive]:
+        yield entry._replace(values=[amount, tolerance])
+
+    @plugin_lib.handle_custom('test.var', 'a date and zero or more bools')
+    def handle_var(self, entry: Custom, date: datetime.date, *flags: bool) -> Iterator[Directive]:
+        yield entry._replace(values=[date, *flags])
+
+
+def _run(text: str) -> tuple[list[Any], list[str]]:
+    entries, errors, options = parser.parse_string(textwrap.dedent(text))
+    assert not errors
+    entries, errors = _Plugin.plugin(entries, options)
+    return [entry.values for entry in entries], [error.message for error in errors]
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('2000-01-01 custom "test.account" Assets:Foo', ['Assets:Foo']),
+    ('2000-01-01 custom "test.account" "foo"', ['foo']),
+    ('2000-01-01 custom "test.number" 10 USD', [decimal.Decimal(10), 'USD']),
+    ('2000-01-01 custom "test.amount" 10 USD', [Amount(decimal.Decimal(10), 'USD')]),
+    ('2000-01-01 custom "test.amount" 10 USD 0.1', [Amount(decimal.Decimal(10), 'USD'), decimal.Decimal('0.1')]),
+    ('2000-01-01 custom "test.var" 2000-01-02', [datetime.date(2000, 1, 2)]),
+    ('2000-01-01 custom "test.var" 2000-01-02 TRUE FALSE', [datetime.date(2000, 1, 2), True, False]),
+])
+def test_args(text: str, expected: list[Any]) -> None:
+    values, errors = _run(text)
+    assert not errors
+    assert values == [expected]
+
+
+@pytest.mark.parametrize('text', [
+    '2000-01-01 custom "test.account"',
+    '2000-01-01 custom "test.account" Assets:Foo Assets:Bar',
+    '2000-01-01 custom "test.account" 1',
+    '2000-01-01 custom "test.number" 10',
+    '2000-01-01 custom "test.amount" 10 USD 0.1 0.1',
+    '2000-01-01 custom "test.var" 2000-01-02 TRUE 1',
+])
+def test_invalid_args(text: str) -> None:
+    values, errors = _run(text)
+    assert not values
+    assert len(errors) == 1 and 'Invalid arguments' in errors[0]
+
+
+@plugin_lib.plugin('test', max_errors_per_category=1)
+class _CappedPlugin(_Plugin):
+    pass
+
+
+def test_max_errors_per_category() -> None:
+    text = textwrap.dedent('''
+        2000-01-01 custom "test.account"
+        2000-01-02 custom "test.account"
+        2000-01-03 custom "test.account"
+    ''')
+    entries, _, options = parser.parse_string(text)
+    _, errors = _Plugin.plugin(entries, options)
+    assert len(errors) == 3
+    _, errors = _CappedPlugin.plugin(entries, options)
+    assert [error.message for error in errors][1:] == ['2 more errors of this kind were omitted']
+
+
+@plugin_lib.plugin('test.move')
+class _MovePlugin(plugin_lib.BasePlugin):
+    """Moves each test.move directive one year earlier, breaking the order of entries."""
+
+    @plugin_lib.handle_custom('test.move', 'a string')
+    def handle_move(self, entry: Custom, value: str) -> Iterator[Directive]:
+        yield entry._replace(date=entry.date.replace(year=entry.date.year - 1), values=[value])
+
+
+@plugin_lib.plugin('test.barrier', barrier=True, preserves_order=True)
+class _BarrierPlugin(plugin_lib.BasePlugin):
+    """Records the dates of entries it receives."""
+    received: list[list[datetime.date]] = []
+
+    def process(self, entries: list[Directive], options: dict[str, Any], arg: Optional[str]) -> Iterator[Directive]:
+        assert isinstance(entries, list)
+        self.received.append([entry.date for entry in entries])
+        for entry in entries:
+            if isinstance(entry, Custom) and entry.type == 'test.error':
+                self._error_logger.log_error(error_lib.PluginError(entry.meta, 'barrier', entry))
+            yield entry
+
+
+def _plugin_func(entries: list[Directive], options: dict[str, Any], arg: str) -> tuple[list[Directive], list[error_lib.Error]]:
+    return [entry._replace(values=[arg]) for entry in entries], []
+
+
+def test_pipeline() -> None:
+    entries, errors, options = parser.parse_string(textwrap.dedent('''
+        2000-01-01 custom "test.move" "foo"
+        2000-06-01 custom "test.error" "bar"
+        2001-01-01 custom "test.account" Assets:Foo
+    '''))
+    assert not errors
+    _BarrierPlugin.received.clear()
+    pipeline = plugin_lib.Pipeline(_MovePlugin, _Plugin, _BarrierPlugin, (_plugin_func, 'baz'))
+
+    results, errors = pipeline.plugin(entries, options)
+
+    # the barrier sees all entries, sorted again after _MovePlugin
+    assert _BarrierPlugin.received == [[datetime.date(1999, 1, 1), datetime.date(2000, 6, 1), datetime.date(2001, 1, 1)]]
+    assert [entry.values for entry in results] == [['baz']] * 3
+    assert [error.message for error in errors] == ['barrier']
+
+
+def test_pipeline_invalid_argument() -> None:
+    with pytest.raises(ValueError):
+        plugin_lib.Pipeline((_Plugin, 'foo'))
+    with pytest.raises(ValueError):
+        plugin_lib.Pipeline(_Plugin).plugin([], {}, 'foo')
+
+
+def test_profiling(tmp_path: pathlib.Path) -> None:
+    profiler = profile_lib.PROFILER
+    profiler.reset()
+    profiler.enable()
+    try:
+        _run('''
+            2000-01-01 custom "test.account" Assets:Foo
+            2000-01-02 custom "test.account" Assets:Bar
+            2000-01-03 custom "test.var" 2000-01-02
+            2000-01-04 custom "other" "foo"
+        ''')
+    finally:
+        profiler.disable()
+    report = profiler.report()
+    profiler.reset()
+
+    assert report['test:handle_account']['calls'] == 2
+    assert report['test:handle_account']['directives'] == 2
+    assert report['test:handle_var']['calls'] == 1
+    assert report['test:process']['calls'] == 1
+    assert report['test:process']['directives'] == 4
+    assert report['test:process']['seconds'] >= report['test:handle_account']['seconds']
+    path = tmp_path / 'profile.json'
+    profiler.stats['test:process'].calls = 1
+    profiler.dump(str(path))
+    assert json.loads(path.read_text()) == {'test:process': {'calls': 1, 'seconds': 0.0, 'directives': 0}}
+    assert 'test:process' in profiler.format_table()
+    profiler.reset()
+
+
+def test_profiling_disabled() -> None:
+    profile_lib.PROFILER.reset()
+    _run('2000-01-01 custom "test.account" Assets:Foo')
+    assert not profile_lib.PROFILER.stats
+
+
+class _CustomSubclass(Custom):
+    pass
+
+
+def test_dispatch_subclass() -> None:
+    entries, errors, options = parser.parse_string('2000-01-01 custom "test.account" Assets:Foo')
+    assert not errors
+    entries = [_CustomSubclass(*entries[0])]
+    results, errors = _Plugin.plugin(entries, options)
+    assert not errors
+    assert [entry.values for entry in results] == [['Assets:Foo']]
@@ -1,5 +1,7 @@
 import collections
 import dataclasses
+import decimal
+import functools
 import io
 import re
 from typing import Any, Callable, Optional, Union
@@ -44,24 +46,89 @@ class ExpectedErrors:
 
 @dataclasses.dataclass(frozen=True)
 class Testcase:
-    source: Ledger
-    source_expected_errors: ExpectedErrors
+    """A plugin argument of a test suite.
+
+    Ledgers are loaded lazily on first use, and each source ledger only once per process.
+    """
+    suite_path: str
     plugin_arg: Optional[str]
-    expected_errors: ExpectedErrors
-    expected_entries: Optional[list[Directive]]
-    
+
+    @property
+    def source(self) -> Ledger:
+        return _load_source(self.suite_path)[0]
+
+    @property
+    def source_expected_errors(self) -> ExpectedErrors:
+        return _load_source(self.suite_path)[1]
+
+    @property
+    def expected_entries(self) -> Optional[list[Directive]]:
+        ledger, _ = _load_expected_cached(self.suite_path, str(self.plugin_arg))
+        return ledger.entries if ledger else None
+
+    @property
+    def expected_errors(self) -> ExpectedErrors:
+        return _load_expected_cached(self.suite_path, str(self.plugin_arg))[1]
+
+
+class _LedgerSnapshot:
+    """Restores a parsed ledger after plugins mutate it in place.
+
+    Directives are immutable but some of their fields are not, e.g. meta dicts, posting lists, tag and link sets, and
+    `Custom.values`. Instead of copying the whole ledger for each testcase, a shallow copy of each mutable field is kept
+    and only the fields that a plugin has mutated are restored afterwards.
+    """
+
+    def __init__(self, entries: list[Directive]):
+        self._saved: list[tuple[Any, Any]] = []
+        for entry in entries:
+            self._save_fields(entry)
+            if isinstance(entry, Transaction):
+                for posting in entry.postings:
+                    self._save_fields(posting)
+
+    def _save_fields(self, value: tuple) -> None:
+        for field in value:
+            if isinstance(field, (dict, list, set)):
+                self._saved.append((field, copy.copy(field)))
+
+    def restore(self) -> None:
+        for field, saved in self._saved:
+            if field != saved:
+                field.clear()
+                if isinstance(field, list):
+                    field.extend(saved)
+                else:
+                    field.update(saved)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_source(suite_path: str) -> tuple[Ledger, ExpectedErrors, _LedgerSnapshot]:
+    source, source_expected_errors = load_expected(suite_path, 'source')
+    assert source
+    return source, source_expected_errors, _LedgerSnapshot(source.entries)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_expected_cached(suite_path: str, name: str) -> tuple[Optional[Ledger], ExpectedErrors]:
+    return load_expected(suite_path, name, escape_brackets=True)
+
 
 def generate_tests(tests_path: str, plugin: Plugin) -> Callable[[Callable[[], None]], Callable[[Testcase], None]]:
     ids, args = collect_testcases(tests_path)
     def decorator(func: Callable[[], None]) -> Callable[[Testcase], None]:
 
         def test(testcase: Testcase) -> None:
-            assert_same_errors(testcase.source.errors, testcase.source_expected_errors)
-            entries, errors = apply_plugin(
-                plugin, testcase.source.entries, testcase.source.options, testcase.plugin_arg)
-            if testcase.expected_entries is not None:
-                assert_same_results(entries, testcase.expected_entries)
-            assert_same_errors(errors, testcase.expected_errors)
+            source, source_expected_errors, snapshot = _load_source(testcase.suite_path)
+            assert_same_errors(source.errors, source_expected_errors)
+            try:
+                entries, errors = apply_plugin(
+                    plugin, list(source.entries), dict(source.options), testcase.plugin_arg)
+                if testcase.expected_entries is not None:
+                    assert_same_results(entries, testcase.expected_entries)
+                assert_same_errors(errors, testcase.expected_errors)
+            finally:
+                snapshot.restore()
             func()
 
         return pytest.mark.parametrize('testcase', args, ids=ids)(test)
@@ -94,21 +161,12 @@ def load_test_suite(tests_path: str, suite: str) -> tuple[list[str], list[Testca
     if 'source' not in names:
         return [], []
     names.remove('source')
-    source, source_expected_errors = load_expected(full_path, 'source')
-    assert source
-    for name in names:
+    for name in sorted(names):
         if name.startswith('_'):
             continue
         plugin_arg = name if name != 'None' else None
-        expected_ledger, expected_errors = load_expected(
-            full_path, name, escape_brackets=True)
         ids.append(f'{suite} ({plugin_arg})')
-        testcases.append(Testcase(
-            source=copy.deepcopy(source),
-            source_expected_errors=source_expected_errors,
-            plugin_arg=plugin_arg,
-            expected_entries=expected_ledger.entries if expected_ledger else None,
-            expected_errors=expected_errors))
+        testcases.append(Testcase(suite_path=full_path, plugin_arg=plugin_arg))
     return ids, testcases
 
 
@@ -150,6 +208,11 @@ def load_expected_errors(path: str) -> ExpectedErrors:
 
 
 def assert_same_results(actuals: list[Directive], expecteds: list[Directive]) -> None:
+    # structural comparison first, which is much cheaper than printing
+    if len(actuals) == len(expecteds) and all(
+            _golden_key(actual) == _golden_key(expected) for actual, expected in zip(actuals, expecteds)):
+        return
+
     # string comparison for better error output
     actual_io = io.StringIO()
     printer.print_entries(actuals, file=actual_io)
@@ -184,6 +247,36 @@ def assert_same_errors(actuals: list[error_lib.Error], expecteds: ExpectedErrors
     assert actual_errors.format() == matched_expected_errors.format(), "unexpected errors"
 
 
+def _golden_key(value: Any) -> Any:
+    """Returns a key of everything printed of a directive.
+
+    Equal keys imply equal printed outputs. Numbers are compared by their string forms as printed.
+    """
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return (type(value), *(
+            _meta_key(field_value) if name == 'meta' else _golden_key(field_value)
+            for name, field_value in zip(value._fields, value)
+            if name != 'diff_amount'))
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, bool):
+        # not equal to 0 or 1
+        return (bool, value)
+    if isinstance(value, list | tuple):
+        return tuple(_golden_key(item) for item in value)
+    if isinstance(value, set | frozenset):
+        return frozenset(value)
+    return value
+
+
+def _meta_key(meta: Optional[dict[str, Any]]) -> Any:
+    if not meta:
+        return None
+    return frozenset(
+        (key, _golden_key(value)) for key, value in meta.items()
+        if key not in ('filename', 'lineno') and not key.startswith('__'))
+
+
 def apply_plugin(
         plugin: Callable,
         entries: list[Directive],
@@ -233,21 +326,26 @@ def generate_goldens(path: str, suite: str, plugin: Plugin) -> None:
     if not testcases:
         print(f'No testcases found for {suite}.')
     for testcase in testcases:
-        entries, errors = apply_plugin(
-            plugin, testcase.source.entries, testcase.source.options, testcase.plugin_arg)
-        if testcase.expected_entries is not None:
-            output_path = os.path.join(path, suite, f'{testcase.plugin_arg}.bean')
-            with open(output_path, 'w') as f:
-                printer.print_entries(entries, file=f)
-            print(f'Generated {output_path}.')
-        if errors:
-            expected_errors = ExpectedErrors()
-            for error in errors:
-                expected_errors.add(
-                    os.path.basename(error.source['filename']),
-                    error.source['lineno'],
-                    error.message)
-            output_path = os.path.join(path, suite, f'{testcase.plugin_arg}.errors')
-            with open(output_path, 'w') as f:
-                f.write(expected_errors.format())
-            print(f'Generated {output_path}.')
+        source, _, snapshot = _load_source(testcase.suite_path)
+        try:
+            entries, errors = apply_plugin(
+                plugin, list(source.entries), dict(source.options), testcase.plugin_arg)
+            if testcase.expected_entries is not None:
+                output_path = os.path.join(path, suite, f'{testcase.plugin_arg}.bean')
+                with open(output_path, 'w') as f:
+                    printer.print_entries(entries, file=f)
+                print(f'Generated {output_path}.')
+            if errors:
+                expected_errors = ExpectedErrors()
+                for error in errors:
+                    expected_errors.add(
+                        os.path.basename(error.source['filename']),
+                        error.source['lineno'],
+                        error.message)
+                output_path = os.path.join(path, suite, f'{testcase.plugin_arg}.errors')
+                with open(output_path, 'w') as f:
+                    f.write(expected_errors.format())
+                print(f'Generated {output_path}.')
+        finally:
+            # outputs may share meta with the source, so they are written first
+            snapshot.restore()
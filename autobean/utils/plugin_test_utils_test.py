@@ -0,0 +1,84 @@
+import pathlib
+import textwrap
+from typing import Any
+from beancount.core.data import Custom, Directive, Transaction
+from beancount.loader import load_file
+from beancount.parser import parser
+import pytest
+from . import plugin_test_utils
+
+
+def _parse(text: str) -> list[Directive]:
+    entries, errors, _ = parser.parse_string(textwrap.dedent(text))
+    assert not errors
+    return entries
+
+
+def test_snapshot_restore() -> None:
+    entries = _parse('''
+        2000-01-01 * #foo
+            share-Alice: 1
+            Assets:Foo  1.00 USD
+                share-Bob: 1
+            Assets:Bar -1.00 USD
+        2000-01-02 custom "foo" "bar" 1.00 USD
+    ''')
+    txn = entries[0]
+    assert isinstance(txn, Transaction)
+    custom = entries[1]
+    assert isinstance(custom, Custom)
+    txn = txn._replace(tags=set(txn.tags))
+    entries[0] = txn
+    snapshot = plugin_test_utils._LedgerSnapshot(entries)
+    del txn.meta['share-Alice']
+    txn.postings[0].meta['foo'] = 'bar'
+    txn.postings.pop()
+    txn.tags.add('bar')
+    custom.values.pop()
+
+    snapshot.restore()
+
+    assert txn.meta['share-Alice'] == 1
+    assert 'foo' not in txn.postings[0].meta
+    assert len(txn.postings) == 2
+    assert txn.tags == {'foo'}
+    assert len(custom.values) == 2
+
+
+@pytest.mark.parametrize('expected', [
+    '2000-01-01 * "foo"\n    Assets:Foo  1.00 USD\n    Assets:Bar -1.00 USD',
+    '2000-01-01 * "foo"\n    Assets:Foo  1.0 USD\n    Assets:Bar -1.00 USD',
+    '2000-01-01 * "foo"\n    Assets:Bar -1.00 USD\n    Assets:Foo  1.00 USD',
+    '2000-01-01 * "foo"\n    key: TRUE\n    Assets:Foo  1.00 USD\n    Assets:Bar -1.00 USD',
+])
+def test_assert_same_results(expected: str) -> None:
+    actual = '2000-01-01 * "foo"\n    key: 1\n    Assets:Foo  1.00 USD\n    Assets:Bar -1.00 USD'
+    actuals, expecteds = _parse('\n' + actual), _parse(expected)
+    with pytest.raises(AssertionError):
+        plugin_test_utils.assert_same_results(actuals, expecteds)
+    plugin_test_utils.assert_same_results(actuals, _parse(actual))
+
+
+def _popping_plugin(entries: list[Directive], options: dict[str, Any], arg: str) -> tuple[list[Directive], list[Any]]:
+    """Moves the narration from meta in place."""
+    return [
+        entry._replace(narration=entry.meta.pop('narration', 'missing'))
+        for entry in entries
+    ], []
+
+
+def test_generate_goldens_restores_source(tmp_path: pathlib.Path) -> None:
+    suite_path = tmp_path / 'suite'
+    suite_path.mkdir()
+    (suite_path / 'source.bean').write_text(textwrap.dedent('''
+        2000-01-01 *
+            narration: "foo"
+    '''))
+    (suite_path / 'a.bean').touch()
+    (suite_path / 'b.bean').touch()
+
+    plugin_test_utils.generate_goldens(str(tmp_path), 'suite', _popping_plugin)
+
+    for name in ('a', 'b'):
+        entries, _, _ = load_file(str(suite_path / f'{name}.bean'))
+        assert [entry.narration for entry in entries] == ['foo']
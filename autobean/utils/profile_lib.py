@@ -0,0 +1,95 @@
+"""Opt-in profiling of plugin handlers.
+
+Set `AUTOBEAN_PROFILE` to a file path to enable profiling. At exit, a JSON report is written to that path and a table
+is printed to stderr. Profiling can also be enabled programmatically with `PROFILER.enable()`.
+
+Times are inclusive and only count time spent inside each handler or `process`. Within a `plugin_lib.Pipeline`, the
+time of a streaming stage also includes that of stages feeding it.
+"""
+
+import atexit
+import collections
+import dataclasses
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO, TypeVar
+
+_ENV_VAR = 'AUTOBEAN_PROFILE'
+_T = TypeVar('_T')
+
+
+@dataclasses.dataclass
+class Stats:
+    calls: int = 0
+    seconds: float = 0.0
+    directives: int = 0
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.stats = collections.defaultdict[str, Stats](Stats)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+    def wrap(self, key: str, func: Callable[..., Iterable[_T]]) -> Callable[..., Iterator[_T]]:
+        """Wraps a function returning directives so that each call is profiled."""
+        def wrapped(*args: Any) -> Iterator[_T]:
+            return self.profile_iterable(key, lambda: func(*args))
+        return wrapped
+
+    def profile_iterable(self, key: str, func: Callable[[], Iterable[_T]]) -> Iterator[_T]:
+        stats = self.stats[key]
+        stats.calls += 1
+        start = time.perf_counter()
+        try:
+            it = iter(func())
+        finally:
+            stats.seconds += time.perf_counter() - start
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                stats.seconds += time.perf_counter() - start
+            stats.directives += 1
+            yield item
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        return {
+            key: dataclasses.asdict(stats)
+            for key, stats in sorted(self.stats.items(), key=lambda item: -item[1].seconds)
+        }
+
+    def format_table(self) -> str:
+        report = self.report()
+        width = max((len(key) for key in report), default=0)
+        lines = [f'{"handler":<{width}}  {"calls":>8}  {"seconds":>10}  {"directives":>10}']
+        for key, stats in report.items():
+            lines.append(
+                f'{key:<{width}}  {stats["calls"]:>8}  {stats["seconds"]:>10.4f}  {stats["directives"]:>10}')
+        return '\n'.join(lines)
+
+    def dump(self, path: str, table_file: Optional[TextIO] = None) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        if table_file is not None:
+            print(self.format_table(), file=table_file)
+
+
+PROFILER = Profiler()
+
+if report_path := os.environ.get(_ENV_VAR):
+    PROFILER.enable()
+    atexit.register(PROFILER.dump, report_path, sys.stderr)
@@ -1,8 +1,11 @@
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Iterator, Optional
 from collections import Counter
-import os.path
+import bisect
+import collections
 import datetime
-from beancount.core.data import Directive, Custom, Transaction, Balance, Posting
+import decimal
+import os.path
+from beancount.core.data import Directive, Custom, Transaction, Balance, Posting, filter_txns, iter_entry_dates
 from beancount import loader
 from beancount.ops.validation import ValidationError
 from autobean.utils import error_lib, plugin_lib
@@ -13,31 +16,56 @@ class CrossCheckError(error_lib.Error):
 
 
 class PostingToCompare:
+    __slots__ = ('posting', 'transaction', 'key')
     posting: Posting
     transaction: Transaction
+    key: tuple[datetime.date, str, str, decimal.Decimal]
 
     def __init__(self, posting: Posting, transaction: Transaction):
         self.posting = posting
         self.transaction = transaction
+        self.key = (transaction.date, posting.account, posting.units.currency, posting.units.number)
 
     def __eq__(self, other: object) -> bool:
-        return (
-            isinstance(other, PostingToCompare) and
-            self.transaction.date == other.transaction.date and
-            self.posting.account == other.posting.account and
-            self.posting.units == other.posting.units)
+        return isinstance(other, PostingToCompare) and self.key == other.key
 
     def __hash__(self) -> int:
-        return hash((self.transaction.date, self.posting.account, self.posting.units))
+        return hash(self.key)
+
+
+class _PostingIndex:
+    """Postings of each account, sorted by date."""
+
+    def __init__(self, entries: Iterable[Directive]) -> None:
+        self._postings = collections.defaultdict[str, list[PostingToCompare]](list)
+        self._dates = collections.defaultdict[str, list[datetime.date]](list)
+        for entry in filter_txns(entries):
+            for posting in entry.postings:
+                self._postings[posting.account].append(PostingToCompare(posting, entry))
+                self._dates[posting.account].append(entry.date)
+
+    def get_postings(self, accounts: set[str], start: datetime.date, end: datetime.date) -> list[PostingToCompare]:
+        ret = []
+        for account in accounts or self._postings.keys():
+            if (dates := self._dates.get(account)) is None:
+                continue
+            ret += self._postings[account][bisect.bisect_left(dates, start):bisect.bisect_left(dates, end)]
+        if len(accounts) != 1:
+            ret.sort(key=lambda posting: posting.key[0])
+        return ret
 
 
-@plugin_lib.plugin('autobean.xcheck')
+@plugin_lib.plugin('autobean.xcheck', barrier=True)
 class CrossCheckPlugin(plugin_lib.BasePlugin):
     _includes: set[str]
+    _statements: dict[str, tuple[list[Directive], list[error_lib.Error], _PostingIndex]]
+    _index: Optional[_PostingIndex]
 
     def process(self, entries: list[Directive], options: dict[str, Any], arg: Optional[str]) -> Iterable[Directive]:
         self._entries = entries
         self._includes = set(options['include'])
+        self._statements = {}
+        self._index = None
         yield from super().process(entries, options, arg)
         options['include'] = list(self._includes)
 
@@ -46,58 +74,106 @@ class CrossCheckPlugin(plugin_lib.BasePlugin):
         path = os.path.join(os.path.dirname(entry.meta['filename']), path)
         accounts = set[str](accounts_tuple)
         end = entry.date
-        stmt_entries, stmt_errors, _ = loader.load_file(path)
-        stmt_errors = [error for error in stmt_errors if not isinstance(error, ValidationError)]
+        stmt_entries, stmt_errors, stmt_index = self._load_statement(path)
         if stmt_errors:
             yield entry
             self._error_logger.log_loading_errors(stmt_errors, entry)
             return
 
-        entries = _filter_by_time_period(self._entries, start, end)
-        stmt_entries = _filter_by_time_period(stmt_entries, start, end)
-        postings = list(_extract_related_postings(entries, accounts))
-        stmt_postings = list(_extract_related_postings(stmt_entries, accounts))
-
-        _, unexpected, missing = _compare_postings(postings, stmt_postings)
-        for posting in unexpected:
-            self._error_logger.log_error(CrossCheckError(
-                posting.posting.meta, 'Unexpected posting', posting.transaction
-            ))
-        for posting in missing:
-            self._error_logger.log_error(CrossCheckError(
-                posting.posting.meta, 'Missing posting', posting.transaction
-            ))
+        if self._index is None:
+            self._index = _PostingIndex(self._entries)
+        postings = self._index.get_postings(accounts, start, end)
+        stmt_postings = stmt_index.get_postings(accounts, start, end)
+
+        self._error_logger.log_errors(_compare_postings(postings, stmt_postings))
         self._includes.add(path)
-        for stmt_entry in stmt_entries:
+        for stmt_entry in iter_entry_dates(stmt_entries, start, end):
             if isinstance(stmt_entry, Balance) and (not accounts or stmt_entry.account in accounts):
                 yield stmt_entry
         yield entry
 
+    def _load_statement(self, path: str) -> tuple[list[Directive], list[error_lib.Error], _PostingIndex]:
+        if (statement := self._statements.get(path)) is None:
+            stmt_entries, stmt_errors, _ = loader.load_file(path)
+            stmt_errors = [error for error in stmt_errors if not isinstance(error, ValidationError)]
+            statement = self._statements[path] = (stmt_entries, stmt_errors, _PostingIndex(stmt_entries))
+        return statement
+
+
+def _compare_postings(postings: list[PostingToCompare], stmt_postings: list[PostingToCompare]) -> Iterator[CrossCheckError]:
+    """Compares two lists of postings sorted by date.
 
-def _extract_related_postings(entries: list[Directive], accounts: set[str]) -> Iterable[PostingToCompare]:
-    for entry in entries:
-        if not isinstance(entry, Transaction):
-            continue
-        for posting in entry.postings:
-            if not accounts or posting.account in accounts:
-                yield PostingToCompare(posting, entry)
+    Both lists are walked side by side one date at a time so only postings of a single date are hashed at once.
+    """
+    for day_postings, day_stmt_postings in _group_by_date(postings, stmt_postings):
+        yield from _compare_day_postings(day_postings, day_stmt_postings)
 
 
-def _compare_postings(postings1: list[PostingToCompare], postings2: list[PostingToCompare]) -> tuple[bool, list[PostingToCompare], list[PostingToCompare]]:
-    missings2 = list(_find_missings(postings1, postings2))
-    missings1 = list(_find_missings(postings2, postings1))
-    same = not missings1 and not missings2
-    return same, missings1, missings2
+def _group_by_date(
+        postings1: list[PostingToCompare],
+        postings2: list[PostingToCompare],
+) -> Iterator[tuple[list[PostingToCompare], list[PostingToCompare]]]:
+    i = j = 0
+    while i < len(postings1) or j < len(postings2):
+        if j == len(postings2) or (i < len(postings1) and postings1[i].key[0] <= postings2[j].key[0]):
+            date = postings1[i].key[0]
+        else:
+            date = postings2[j].key[0]
+        i_end = i
+        while i_end < len(postings1) and postings1[i_end].key[0] == date:
+            i_end += 1
+        j_end = j
+        while j_end < len(postings2) and postings2[j_end].key[0] == date:
+            j_end += 1
+        yield postings1[i:i_end], postings2[j:j_end]
+        i, j = i_end, j_end
+
+
+def _compare_day_postings(postings: list[PostingToCompare], stmt_postings: list[PostingToCompare]) -> Iterator[CrossCheckError]:
+    unexpected = list(_find_missings(stmt_postings, postings))
+    missing = list(_find_missings(postings, stmt_postings))
+    # pairs up postings on the same account and currency but with different numbers as near misses
+    unexpected_by_account = collections.defaultdict[tuple[str, str], collections.deque[PostingToCompare]](
+        collections.deque)
+    for posting in unexpected:
+        unexpected_by_account[posting.key[1:3]].append(posting)
+    near_misses = dict[int, PostingToCompare]()
+    for stmt_posting in missing:
+        if candidates := unexpected_by_account.get(stmt_posting.key[1:3]):
+            posting = candidates.popleft()
+            near_misses[id(posting)] = stmt_posting
+            near_misses[id(stmt_posting)] = posting
+    for posting in unexpected:
+        yield CrossCheckError(
+            _get_meta(posting),
+            'Unexpected posting' + _format_near_miss(near_misses.get(id(posting)), 'statement'),
+            posting.transaction)
+    for stmt_posting in missing:
+        yield CrossCheckError(
+            _get_meta(stmt_posting),
+            'Missing posting' + _format_near_miss(near_misses.get(id(stmt_posting)), 'ledger'),
+            stmt_posting.transaction)
+
+
+def _get_meta(posting: PostingToCompare) -> dict[str, Any]:
+    # postings generated by plugins (e.g. pad) may come without location
+    if posting.posting.meta and 'filename' in posting.posting.meta:
+        return posting.posting.meta
+    return posting.transaction.meta
+
+
+def _format_near_miss(counterpart: Optional[PostingToCompare], side: str) -> str:
+    if counterpart is None:
+        return ''
+    meta = _get_meta(counterpart)
+    location = f' ({meta["filename"]}:{meta.get("lineno")})' if meta.get('filename') else ''
+    return f' (possible mismatch: {counterpart.posting.units} in {side}{location})'
 
 
 def _find_missings(postings1: Iterable[PostingToCompare], postings2: Iterable[PostingToCompare]) -> Iterable[PostingToCompare]:
-    hashed1 = Counter(postings1)
+    hashed1 = Counter(posting.key for posting in postings1)
     for posting in postings2:
-        if hashed1[posting]:
-            hashed1[posting] -= 1
+        if hashed1[posting.key]:
+            hashed1[posting.key] -= 1
         else:
             yield posting
-
-
-def _filter_by_time_period(entries: Iterable[Directive], start: datetime.date, end: datetime.date) -> list[Directive]:
-    return[entry for entry in entries if start <= entry.date < end]
@@ -1,4 +1,8 @@
 import os.path
+from typing import Any
+import pytest
+from beancount import loader
+from beancount.core.data import Directive
 from autobean.xcheck import plugin
 import autobean.utils.plugin_test_utils as utils
 
@@ -23,3 +27,20 @@ def test_include_option() -> None:
 
     assert not errors, errors
     assert statement_path in ledger.options['include'], 'statement files not added into options["include"]'
+
+
+def test_statement_loaded_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    test_path = os.path.join(os.path.dirname(__file__), 'multiple-periods')
+    source_path = os.path.join(test_path, 'source.bean')
+    statement_path = os.path.join(test_path, '_statement.bean')
+    ledger = utils.load_ledger(source_path)
+    loaded_paths = []
+    load_file = loader.load_file
+    def counting_load_file(filename: str) -> tuple[list[Directive], list, dict[str, Any]]:
+        loaded_paths.append(filename)
+        return load_file(filename)
+    monkeypatch.setattr(loader, 'load_file', counting_load_file)
+
+    utils.apply_plugin(plugin.CrossCheckPlugin.plugin, ledger.entries, ledger.options, None)
+
+    assert loaded_paths == [statement_path]